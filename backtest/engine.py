@@ -0,0 +1,150 @@
+import math
+import logging
+import numpy as np
+import pandas as pd
+from config.settings import Config
+from strategy.moving_average import MovingAverageCrossover, crossover_signals
+
+logger = logging.getLogger("TradingBot")
+
+class Backtester:
+    """
+    Vectorized historical backtest of the SMA crossover strategy across a universe of symbols.
+
+    The whole signal history (bars x symbols) is computed in one NumPy pass. Only the bars that
+    carry a signal are then walked in time order to apply the live trading rules, which are
+    path dependent:
+      - RiskEngine.check_trade: max Config.MAX_TRADES_PER_DAY trades per day, no trading once the
+        day's loss exceeds Config.DAILY_STOP_LOSS_PCT, Config.MAX_CAPITAL_PER_TRADE_PCT of equity
+        per position.
+      - Executor.execute_signal: long only; BUY opens a position when flat, SELL closes it.
+    Trades fill at the signal bar's close. The day's starting balance is the equity at the
+    previous day's last bar.
+    """
+
+    def __init__(self, strategy=None, initial_capital=Config.BACKTEST_INITIAL_CAPITAL):
+        self.strategy = strategy or MovingAverageCrossover(Config.SMA_SHORT, Config.SMA_LONG)
+        self.initial_capital = initial_capital
+
+    def run(self, market_data):
+        """
+        Runs the backtest.
+
+        Args:
+            market_data (dict | pd.DataFrame): symbol -> OHLCV DataFrame, or a close-price
+                DataFrame with one column per symbol.
+
+        Returns:
+            dict: {"equity_curve": pd.Series, "trades": pd.DataFrame, "stats": dict}
+        """
+        closes = self._close_matrix(market_data)
+        symbols = list(closes.columns)
+        index = closes.index
+        prices = closes.to_numpy(dtype=np.float64)
+
+        signals = crossover_signals(prices, self.strategy.short_window, self.strategy.long_window)
+        # Last known price per symbol, 0 before a symbol's first bar (no position can exist there)
+        marks = np.nan_to_num(closes.ffill().to_numpy(dtype=np.float64), nan=0.0)
+
+        days = pd.DatetimeIndex(index).normalize()
+        day_codes = pd.factorize(days)[0]
+
+        n_bars, n_symbols = prices.shape
+        cash = self.initial_capital
+        shares = np.zeros(n_symbols)
+        entry_price = np.zeros(n_symbols)
+        share_deltas = np.zeros((n_bars, n_symbols))
+        cash_deltas = np.zeros(n_bars)
+
+        trades = []
+        blocked = {"max_trades": 0, "daily_loss": 0, "zero_qty": 0}
+        current_day, trades_today, starting_balance = -1, 0, self.initial_capital
+
+        for t in np.flatnonzero(signals.any(axis=1)):
+            # Holdings only change on signal bars, so the current book is also the previous close's
+            if day_codes[t] != current_day:
+                current_day, trades_today = day_codes[t], 0
+                starting_balance = cash + shares @ marks[t - 1] if t > 0 else cash
+            equity = cash + shares @ marks[t]
+
+            for j in np.flatnonzero(signals[t]):
+                # Risk Engine
+                if trades_today >= Config.MAX_TRADES_PER_DAY:
+                    blocked["max_trades"] += 1
+                    continue
+                daily_loss_pct = -(equity - starting_balance) / starting_balance if starting_balance > 0 else 0
+                if daily_loss_pct > Config.DAILY_STOP_LOSS_PCT:
+                    blocked["daily_loss"] += 1
+                    continue
+
+                # Executor
+                price = prices[t, j]
+                qty = math.floor(equity * Config.MAX_CAPITAL_PER_TRADE_PCT / price)
+                if qty <= 0:
+                    blocked["zero_qty"] += 1
+                    continue
+
+                if signals[t, j] == 1 and shares[j] == 0:
+                    cost = qty * price
+                    cash -= cost
+                    cash_deltas[t] -= cost
+                    shares[j] = qty
+                    share_deltas[t, j] += qty
+                    entry_price[j] = price
+                    trades.append((index[t], symbols[j], 'buy', qty, price, 0.0))
+                    trades_today += 1
+                elif signals[t, j] == -1 and shares[j] > 0:
+                    qty = shares[j]
+                    cash += qty * price
+                    cash_deltas[t] += qty * price
+                    share_deltas[t, j] -= qty
+                    shares[j] = 0
+                    trades.append((index[t], symbols[j], 'sell', qty, price, qty * (price - entry_price[j])))
+                    trades_today += 1
+
+        holdings_value = (np.cumsum(share_deltas, axis=0) * marks).sum(axis=1)
+        equity_curve = pd.Series(
+            self.initial_capital + np.cumsum(cash_deltas) + holdings_value,
+            index=index, name="equity"
+        )
+        # Like the live executor, sizing does not check buying power, so exposure can exceed equity
+        with np.errstate(divide='ignore', invalid='ignore'):
+            leverage = np.where(equity_curve.to_numpy() > 0, holdings_value / equity_curve.to_numpy(), np.inf)
+        trades = pd.DataFrame(trades, columns=["timestamp", "symbol", "side", "qty", "price", "pnl"])
+
+        return {
+            "equity_curve": equity_curve,
+            "trades": trades,
+            "stats": self._stats(equity_curve, trades, blocked, leverage),
+        }
+
+    @staticmethod
+    def _close_matrix(market_data):
+        if isinstance(market_data, pd.DataFrame):
+            closes = market_data
+        else:
+            closes = pd.concat({sym: df['Close'] for sym, df in market_data.items() if not df.empty}, axis=1)
+        return closes.sort_index().astype(np.float64)
+
+    def _stats(self, equity_curve, trades, blocked, leverage):
+        values = equity_curve.to_numpy()
+        returns = np.diff(values) / values[:-1] if len(values) > 1 else np.array([])
+        peak = np.maximum.accumulate(values) if len(values) else values
+        years = (equity_curve.index[-1] - equity_curve.index[0]).days / 365.25 if len(values) > 1 else 0
+        periods_per_year = len(returns) / years if years > 0 else 0
+        final = values[-1] if len(values) else self.initial_capital
+        closed = trades[trades["side"] == "sell"]
+
+        return {
+            "initial_capital": self.initial_capital,
+            "final_equity": float(final),
+            "total_return": float(final / self.initial_capital - 1),
+            "cagr": float((final / self.initial_capital) ** (1 / years) - 1) if years > 0 and final > 0 else 0.0,
+            "sharpe": float(returns.mean() / returns.std() * np.sqrt(periods_per_year)) if len(returns) > 1 and returns.std() > 0 else 0.0,
+            "max_drawdown": float(((values - peak) / peak).min()) if len(values) else 0.0,
+            "trades": int(len(trades)),
+            "round_trips": int(len(closed)),
+            "win_rate": float((closed["pnl"] > 0).mean()) if len(closed) else 0.0,
+            "max_leverage": float(leverage.max()) if len(leverage) else 0.0,
+            "blocked": blocked,
+        }
@@ -0,0 +1,136 @@
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from config.settings import Config
+from strategy.moving_average import cumulative_sums, sma_from_cumsum, crossover_from_smas
+
+logger = logging.getLogger("TradingBot")
+
+# Worker-process view of the shared close matrix (symbols x bars), set by _attach_shared_prices
+_shared = {}
+
+def _attach_shared_prices(name, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["prices"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+def _sweep_symbols(rows, pairs, periods_per_year):
+    """
+    Evaluates every (short, long) pair for the given rows of the shared close matrix.
+    Each symbol gets one prefix-sum pass and one SMA per distinct window; every pair
+    is then an O(n) comparison plus an O(n) return calculation.
+    """
+    prices = _shared["prices"]
+    windows = sorted({w for pair in pairs for w in pair})
+    results = []
+
+    for row in rows:
+        closes = prices[row]
+        csum, ccount = cumulative_sums(closes)
+        smas = {w: sma_from_cumsum(csum, ccount, w) for w in windows}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bar_returns = np.nan_to_num(np.diff(closes) / closes[:-1], nan=0.0, posinf=0.0, neginf=0.0)
+        bar_index = np.arange(len(closes))
+
+        for short, long in pairs:
+            signals = crossover_from_smas(smas[short], smas[long])
+
+            # Long only: in the market from a BUY bar's close until a SELL bar's close
+            last_event = np.maximum.accumulate(np.where(signals != 0, bar_index, -1))
+            position = (last_event >= 0) & (signals[np.maximum(last_event, 0)] == 1)
+            strategy_returns = position[:-1] * bar_returns
+
+            equity = np.cumprod(1.0 + strategy_returns)
+            peak = np.maximum.accumulate(equity) if len(equity) else equity
+            std = strategy_returns.std()
+
+            results.append((
+                row, short, long,
+                float(equity[-1] - 1.0) if len(equity) else 0.0,
+                float(strategy_returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0,
+                float((equity / peak - 1.0).min()) if len(equity) else 0.0,
+                int(np.count_nonzero(np.diff(position.astype(np.int8)))),
+            ))
+    return results
+
+class ParameterSweep:
+    """
+    Grid search over SMA_SHORT / SMA_LONG window pairs across many symbols.
+
+    The close matrix is placed once in shared memory and a process pool evaluates chunks of
+    symbols against the whole grid, so no DataFrame is pickled to the workers. Each pair is
+    scored with a long-only crossover simulation (no sizing or daily limits; use Backtester
+    to check a chosen pair under the full risk rules).
+    """
+
+    COLUMNS = ["symbol", "short_window", "long_window", "total_return", "sharpe", "max_drawdown", "trades"]
+
+    def __init__(self, short_windows=None, long_windows=None, workers=Config.SWEEP_WORKERS):
+        self.short_windows = short_windows or Config.SWEEP_SHORT_WINDOWS
+        self.long_windows = long_windows or Config.SWEEP_LONG_WINDOWS
+        self.workers = workers
+        self.results_by_symbol = pd.DataFrame(columns=self.COLUMNS)
+
+    def pairs(self):
+        return [(s, l) for s in self.short_windows for l in self.long_windows if s < l]
+
+    def run(self, market_data):
+        """
+        Runs the sweep.
+
+        Args:
+            market_data (dict | pd.DataFrame): symbol -> OHLCV DataFrame, or a close-price
+                DataFrame with one column per symbol.
+
+        Returns:
+            pd.DataFrame: One row per window pair, ranked by mean Sharpe across symbols.
+                Per-symbol results are kept in `self.results_by_symbol`.
+        """
+        if isinstance(market_data, pd.DataFrame):
+            closes = market_data
+        else:
+            closes = pd.concat({sym: df['Close'] for sym, df in market_data.items() if not df.empty}, axis=1)
+        closes = closes.sort_index()
+        symbols = list(closes.columns)
+        pairs = self.pairs()
+
+        index = pd.DatetimeIndex(closes.index)
+        years = (index[-1] - index[0]).days / 365.25 if len(index) > 1 else 0
+        periods_per_year = (len(index) - 1) / years if years > 0 else 252
+
+        # One contiguous row per symbol
+        matrix = np.ascontiguousarray(closes.to_numpy(dtype=np.float64).T)
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+            del matrix
+
+            n_chunks = min(len(symbols), self.workers * 4) or 1
+            chunks = [c.tolist() for c in np.array_split(np.arange(len(symbols)), n_chunks) if len(c)]
+            logger.info("Sweeping %s window pairs x %s symbols on %s worker(s)...", len(pairs), len(symbols), self.workers)
+
+            rows = []
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_shared_prices,
+                                     initargs=(shm.name, (len(symbols), len(index)))) as pool:
+                for chunk_rows in pool.map(_sweep_symbols, chunks, [pairs] * len(chunks), [periods_per_year] * len(chunks)):
+                    rows.extend(chunk_rows)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        detail = pd.DataFrame(rows, columns=self.COLUMNS)
+        detail["symbol"] = [symbols[i] for i in detail["symbol"]]
+        self.results_by_symbol = detail
+
+        summary = detail.groupby(["short_window", "long_window"]).agg(
+            mean_sharpe=("sharpe", "mean"),
+            median_sharpe=("sharpe", "median"),
+            mean_return=("total_return", "mean"),
+            mean_max_drawdown=("max_drawdown", "mean"),
+            trades=("trades", "sum"),
+        ).sort_values("mean_sharpe", ascending=False).reset_index()
+        summary.insert(0, "rank", np.arange(1, len(summary) + 1))
+        return summary
@@ -0,0 +1,248 @@
+"""
+End-to-end latency and memory benchmark for the trading cycle.
+
+Runs the real data, strategy, risk and execution components against synthetic OHLCV data and a
+SimulatedBroker (no network, no API keys), at several universe sizes, and reports:
+
+  - latency percentiles of every stage of main.run_trading_cycle, read from its spans
+    (the trading_stage_seconds histogram): prepare, fetch_data, stops, signals, risk_check
+    (the batched risk pass), execution, order_submit (per order) and the whole cycle;
+  - memory: tracemalloc peak and retained allocations of one cycle, and the size of the
+    fetched bars as DataFrames against the same bars in a BarStore.
+
+The synthetic market advances one bar per repeat, so crossovers (and orders) happen naturally;
+stages with no orders in a run (e.g. a single symbol) report a count of 0.
+
+Usage:
+    python -m benchmarks.cycle_benchmark --sizes 1,100,5000 --output bench.json
+    python -m benchmarks.cycle_benchmark --sizes 1,100 --compare bench.json
+    python -m benchmarks.cycle_benchmark --compare base.json new.json
+
+Compare mode prints the per-stage p50/p95 change of a run against a baseline and exits with
+status 1 when any stage got slower than --threshold, so it can gate CI.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config.settings import Config
+from broker.simulated_broker import SimulatedBroker
+from risk.state_store import RiskStateStore
+from execution.order_pipeline import OrderPipeline
+from service.trading_service import TradingService
+from data.bar_store import BarStore
+from monitoring.metrics import STAGE_LATENCY, ORDERS
+from main import run_trading_cycle
+
+logger = logging.getLogger("TradingBot")
+
+LIFTED_LIMITS = ("MAX_TRADES_PER_DAY", "MAX_GROSS_EXPOSURE_PCT", "MAX_NET_EXPOSURE_PCT",
+                 "MAX_SECTOR_EXPOSURE_PCT", "MAX_CORRELATED_EXPOSURE_PCT")
+STAGES = ("prepare", "fetch_data", "stops", "signals", "risk_check", "execution", "order_submit", "cycle")
+
+def synthetic_frames(symbols, bars, seed=0):
+    """
+    Seeded random-walk daily OHLCV frames (symbol -> DataFrame with Open..Volume).
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=pd.Timestamp.now(tz='UTC').normalize(), periods=bars, freq='D')
+    frames = {}
+    for symbol in symbols:
+        close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, bars)))
+        frames[symbol] = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, bars)),
+            'High': close * (1 + np.abs(rng.normal(0, 0.005, bars))),
+            'Low': close * (1 - np.abs(rng.normal(0, 0.005, bars))),
+            'Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, bars).astype(float),
+        }, index=index)
+    return frames
+
+def percentiles(samples):
+    """
+    Latency summary in milliseconds for a list of durations in seconds.
+    """
+    values = np.asarray(samples, dtype=float) * 1000.0
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+class CycleBenchmark:
+    """
+    Benchmarks one universe size. History is `bars` long and moves forward one bar per repeat.
+    """
+
+    def __init__(self, n_symbols, bars=200, repeats=5, seed=0):
+        self.symbols = [f"SYM{i:05d}" for i in range(n_symbols)]
+        self.bars = bars
+        self.repeats = repeats
+        self.history = synthetic_frames(self.symbols, bars + repeats + 1, seed)
+        self.broker = SimulatedBroker(initial_cash=Config.SIM_INITIAL_CASH * max(1, n_symbols), synthetic=False)
+        self.service = TradingService(broker=self.broker, risk_store=RiskStateStore(":memory:"), use_bar_cache=False,
+                                      use_data_fallback=False)
+        # The simulated broker has no request quota; a throttled pipeline would time the rate limit
+        self.pipeline = OrderPipeline(self.broker, rate_per_min=10 ** 9, burst=10 ** 6)
+        self.samples = {stage: [] for stage in STAGES}
+
+    def _advance(self, step):
+        # Expose bars up to `step` and mark prices at the latest close
+        end = self.bars + step
+        self.broker.frames = {s: df.iloc[:end] for s, df in self.history.items()}
+        self.broker.set_prices({s: df['Close'].iloc[end - 1] for s, df in self.history.items()})
+
+    @staticmethod
+    def _spans():
+        # (sum, count) of every stage's span so far
+        children = {stage: STAGE_LATENCY.labels(stage=stage) for stage in STAGES}
+        return {stage: (child.sum, child.count) for stage, child in children.items()}
+
+    def _cycle(self):
+        # One cycle exactly as main runs it; each stage's sample is its mean span duration in
+        # this cycle (spans observed per order, like order_submit, are averaged over the orders)
+        before = self._spans()
+        run_trading_cycle(self.symbols, service=self.service)
+        for stage, (total, count) in self._spans().items():
+            spans = count - before[stage][1]
+            if spans:
+                self.samples[stage].append((total - before[stage][0]) / spans)
+
+    def run(self):
+        # Signals on random data must all reach the broker, so lift the daily trade cap and the
+        # portfolio exposure limits for the run (check_trades still evaluates all of them)
+        limits = {name: getattr(Config, name) for name in LIFTED_LIMITS}
+        for name in LIFTED_LIMITS:
+            setattr(Config, name, sys.maxsize)
+        orders = ORDERS.labels(side="buy", result="accepted"), ORDERS.labels(side="sell", result="accepted")
+        try:
+            self._advance(0)
+            self.service.prepare_cycle()
+            self.service.executor.pipeline = self.pipeline
+            run_trading_cycle(self.symbols, service=self.service)  # warm-up: imports, pools, caches
+
+            orders_before = sum(child.value for child in orders)
+            for step in range(1, self.repeats + 1):
+                self._advance(step)
+                self._cycle()
+            cycle_orders = int(sum(child.value for child in orders) - orders_before)
+
+            tracemalloc.start()
+            run_trading_cycle(self.symbols, service=self.service)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            market_data = self.service.data_feed.get_market_data_batch(self.symbols, timeframe=Config.TIMEFRAME)
+            frames_bytes = sum(int(df.memory_usage(index=True).sum()) for df in market_data.values())
+            store_bytes = BarStore.from_frames(market_data, capacity=max(map(len, market_data.values()))).nbytes
+        finally:
+            for name, value in limits.items():
+                setattr(Config, name, value)
+            self.service.close()
+
+        return {
+            "symbols": len(self.symbols),
+            "stages": {stage: percentiles(samples) for stage, samples in self.samples.items()},
+            "memory": {"cycle_peak_mb": peak / 2 ** 20, "cycle_retained_mb": current / 2 ** 20,
+                       "frames_mb": frames_bytes / 2 ** 20, "bar_store_mb": store_bytes / 2 ** 20},
+            "cycle_orders": cycle_orders,
+        }
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(sizes, bars=200, repeats=5):
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "bars": bars,
+            "repeats": repeats,
+        },
+        "results": {},
+    }
+    for n in sizes:
+        print(f"Benchmarking {n} symbol(s)...", file=sys.stderr)
+        results["results"][str(n)] = CycleBenchmark(n, bars=bars, repeats=repeats).run()
+    return results
+
+def compare(base, new, threshold=0.2):
+    """
+    Prints p50/p95 changes of `new` against `base` for every size both runs share.
+    Returns the list of (size, stage, metric, change) regressions above `threshold`.
+    """
+    regressions = []
+    print(f"{'symbols':>8} {'stage':<16} {'metric':<6} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for size in sorted(set(base["results"]) & set(new["results"]), key=int):
+        for stage in STAGES:
+            old_stats = base["results"][size]["stages"].get(stage, {})
+            new_stats = new["results"][size]["stages"].get(stage, {})
+            for metric in ("p50_ms", "p95_ms"):
+                if not old_stats.get(metric) or metric not in new_stats:
+                    continue
+                change = new_stats[metric] / old_stats[metric] - 1
+                flag = " !" if change > threshold else ""
+                print(f"{size:>8} {stage:<16} {metric[:3]:<6} {old_stats[metric]:>10.3f} {new_stats[metric]:>10.3f} {change:>+8.1%}{flag}")
+                if change > threshold:
+                    regressions.append((size, stage, metric, change))
+        old_mem = base["results"][size]["memory"]["cycle_peak_mb"]
+        new_mem = new["results"][size]["memory"]["cycle_peak_mb"]
+        print(f"{size:>8} {'memory peak':<16} {'MB':<6} {old_mem:>10.2f} {new_mem:>10.2f} {new_mem / old_mem - 1 if old_mem else 0:>+8.1%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading cycle latency and memory benchmark')
+    parser.add_argument('--sizes', type=str, default='1,100,5000', help='Comma-separated universe sizes')
+    parser.add_argument('--bars', type=int, default=200, help='Bars of history per symbol')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed cycles per size')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    parser.add_argument('--compare', type=str, nargs='+', metavar='JSON',
+                        help='BASE [NEW]: compare a new run (or the NEW file) against BASE')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression')
+    args = parser.parse_args()
+
+    # Per-order log lines would dominate the timings
+    logger.setLevel(logging.CRITICAL)
+
+    if args.compare and len(args.compare) > 1:
+        with open(args.compare[1]) as f:
+            results = json.load(f)
+    else:
+        results = run_suite([int(s) for s in args.sizes.split(',') if s.strip()], bars=args.bars, repeats=args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not args.compare:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    with open(args.compare[0]) as f:
+        base = json.load(f)
+    regressions = compare(base, results, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
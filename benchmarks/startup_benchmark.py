@@ -0,0 +1,116 @@
+"""
+Startup-time benchmark: how long the bot takes before (and until) doing useful work.
+
+Each command runs in a fresh interpreter, so import costs are paid every time exactly as in
+cron-style invocations:
+
+  - help:            python main.py --help    (argument parsing only)
+  - import_main:     python -c "import main"
+  - simulated_cycle: python main.py --simulate --symbols SPY    (a full one-shot cycle, offline)
+
+It also records the slowest imports of `import main` from `python -X importtime`.
+
+Usage:
+    python -m benchmarks.startup_benchmark --runs 10 --output startup.json
+    python -m benchmarks.startup_benchmark --compare startup.json
+    python -m benchmarks.startup_benchmark --root /path/to/other/checkout   # benchmark another tree
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "help": ["main.py", "--help"],
+    "import_main": ["-c", "import main"],
+    "simulated_cycle": ["main.py", "--simulate", "--symbols", "SPY"],
+}
+
+def time_command(args, root, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+    }
+
+def slowest_imports(root, top=15):
+    """
+    Cumulative import times (ms) of the slowest modules imported directly by main.py.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=root,
+                            capture_output=True, text=True, check=True)
+    # importtime prints children before their parent, indented two spaces per level
+    children, modules = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000.0
+        elif depth == 0:
+            if name.strip() == "main":
+                modules = children
+            children = {}
+    return dict(sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top])
+
+def run_suite(root, runs):
+    results = {"root": os.path.abspath(root), "python": sys.version.split()[0], "commands": {}}
+    for name, args in COMMANDS.items():
+        print(f"Timing {name}...", file=sys.stderr)
+        results["commands"][name] = time_command(args, root, runs)
+    results["imports_ms"] = slowest_imports(root)
+    return results
+
+def compare(base, new, threshold=0.2):
+    regressions = []
+    print(f"{'command':<16} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for name in COMMANDS:
+        if name not in base["commands"] or name not in new["commands"]:
+            continue
+        old_ms, new_ms = base["commands"][name]["median_ms"], new["commands"][name]["median_ms"]
+        change = new_ms / old_ms - 1
+        print(f"{name:<16} {old_ms:>10.1f} {new_ms:>10.1f} {change:>+8.1%}{' !' if change > threshold else ''}")
+        if change > threshold:
+            regressions.append((name, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup-time benchmark')
+    parser.add_argument('--root', type=str, default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='Checkout to benchmark (default: this one)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per command')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    parser.add_argument('--compare', type=str, metavar='JSON', help='Compare against a previous result')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown counted as a regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.root, args.runs)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not args.compare:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    with open(args.compare) as f:
+        base = json.load(f)
+    regressions = compare(base, results, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,118 +1,256 @@
 import logging
 import time
+import threading
 import pandas as pd
-import alpaca_trade_api as tradeapi
-from alpaca_trade_api.rest import REST, TimeFrame
 from config.settings import Config
+from data.timeframes import TIMEFRAME_MINUTES, normalize_timeframe, lookback_days
+from monitoring.metrics import BROKER_LATENCY, BROKER_ERRORS, SNAPSHOT_READS
 
 logger = logging.getLogger("TradingBot")
 
+def create_session(pool_size=Config.HTTP_POOL_SIZE):
+    """
+    Creates an HTTP session with a keep-alive connection pool sized for concurrent requests.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 class AlpacaAdapter:
-    def __init__(self):
+    def __init__(self, session=None, snapshot_ttl=Config.SNAPSHOT_TTL):
+        # REST creates a private session per client; a shared pooled one can be injected instead
+        self.session = session
+        # Account / positions / open orders snapshots: key -> (fetched_at, value)
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshots = {}
+        self._snapshot_lock = threading.Lock()
+        self.connect()
+
+    def connect(self):
+        self.invalidate_snapshot()
         try:
+            # The SDK (and aiohttp under it) is imported only once a real connection is made
+            from alpaca_trade_api.rest import REST
             self.api = REST(Config.API_KEY, Config.API_SECRET, Config.BASE_URL)
+            if self.session is not None:
+                self.api._session.close()
+                self.api._session = self.session
             self.account = self.get_account()
             if self.account:
-                logger.info(f"Connected to Alpaca. Account Status: {self.account.status}. Balance: {self.account.equity}")
+                logger.info("Connected to Alpaca. Account Status: %s. Balance: %s", self.account.status, self.account.equity)
             else:
                 logger.error("Failed to connect to Alpaca.")
         except Exception as e:
-            logger.error(f"Error initializing Alpaca connection: {e}")
+            logger.error("Error initializing Alpaca connection: %s", e)
             self.api = None
 
+    def ensure_connected(self):
+        """
+        Checks the connection with a single account request and reconnects only if it fails.
+        Returns True if the broker is usable.
+        """
+        if self.api is not None:
+            self.account = self.get_account()
+            if self.account:
+                return True
+            logger.warning("Alpaca connection lost. Reconnecting...")
+        self.connect()
+        return self.api is not None and self.account is not None
+
+    def _request(self, method, fn, *args, **kwargs):
+        # Every REST call goes through here so its latency and failures are recorded
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            BROKER_ERRORS.inc(method=method)
+            raise
+        finally:
+            BROKER_LATENCY.observe(time.perf_counter() - start, method=method)
+
+    def _snapshot(self, key, fetch):
+        # Serves `key` from the snapshot cache while younger than snapshot_ttl, else refetches.
+        # Failed fetches raise and are never cached.
+        with self._snapshot_lock:
+            entry = self._snapshots.get(key)
+        if entry and time.monotonic() - entry[0] < self.snapshot_ttl:
+            SNAPSHOT_READS.inc(snapshot=key, result="hit")
+            return entry[1]
+
+        SNAPSHOT_READS.inc(snapshot=key, result="miss")
+        value = fetch()
+        with self._snapshot_lock:
+            self._snapshots[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate_snapshot(self):
+        """
+        Drops the cached account, positions and open orders so the next read hits the API.
+        Called after any order is submitted or cancelled.
+        """
+        with self._snapshot_lock:
+            self._snapshots.clear()
+
     def get_account(self):
         try:
-            return self.api.get_account()
+            return self._snapshot('account', lambda: self._request('get_account', self.api.get_account))
         except Exception as e:
-            logger.error(f"Error fetching account info: {e}")
+            logger.error("Error fetching account info: %s", e)
             return None
 
+    def _fetch_positions(self):
+        positions = self._request('list_positions', self.api.list_positions)
+        logger.info("Fetched %s open positions.", len(positions))
+        return {p.symbol: p for p in positions}
+
     def get_positions(self):
         try:
-            positions = self.api.list_positions()
-            logger.info(f"Fetched {len(positions)} open positions.")
-            return positions
+            return list(self._snapshot('positions', self._fetch_positions).values())
         except Exception as e:
-            logger.error(f"Error fetching positions: {e}")
+            logger.error("Error fetching positions: %s", e)
             return []
 
+    def get_position(self, symbol):
+        """
+        Returns the open position for `symbol` from the positions snapshot, or None if flat.
+        """
+        try:
+            return self._snapshot('positions', self._fetch_positions).get(symbol)
+        except Exception as e:
+            logger.error("Error fetching positions: %s", e)
+            return None
+
     def get_open_orders(self):
         try:
-            orders = self.api.list_orders(status='open')
+            orders = self._snapshot('open_orders', lambda: self._request('list_orders', self.api.list_orders, status='open'))
             return orders
         except Exception as e:
-            logger.error(f"Error fetching open orders: {e}")
+            logger.error("Error fetching open orders: %s", e)
             return []
 
     def submit_order(self, symbol, qty, side, type='market', time_in_force='day', stop_loss=None):
         """
-        Submits an order to Alpaca.
-        If stop_loss is provided (percentage, e.g., 0.02 for 2%), a bracket order could be used,
-        but for simplicity in MVP we might stick to market order or simple stop loss.
-        The prompt asks for 'Stop loss automático 2%'. This implies the order should have a stop loss attached.
-        Alpaca supports bracket orders.
+        Submits an order to Alpaca. Returns the order, or None if it failed.
+
+        `stop_loss` is accepted for compatibility and not sent: stops are kept client-side by
+        risk.stop_monitor.StopMonitor, which the Executor updates as orders fill and which
+        exits breached positions with plain market orders.
+        """
+        try:
+            return self.place_order(symbol, qty, side, type=type, time_in_force=time_in_force)
+        except Exception as e:
+            logger.error("Error submitting order: %s", e)
+            return None
+
+    def place_order(self, symbol, qty, side, type='market', time_in_force='day', client_order_id=None):
+        """
+        Submits an order and raises on failure instead of returning None, so callers
+        (e.g. OrderPipeline) can tell transient errors apart and retry them.
+
+        Retries must pass the same `client_order_id`: if an earlier attempt reached Alpaca
+        (e.g. it timed out after being accepted), Alpaca rejects the resend as a duplicate and
+        the original order is returned instead of a second one being placed.
         """
         try:
-            if stop_loss:
-                # Calculate stop price based on current price is difficult without fetching it first.
-                # However, Alpaca API allows 'stop_loss' parameter in submit_order for bracket orders if we use 'bracket' class or similar output, 
-                # but 'market' orders with stop_loss logic are complex. 
-                # For an MVP, we can place a market order, then immediately place a stop loss order, 
-                # OR use the 'order_class' parameter if supported for the asset.
-                # Let's try to use simple market orders first, and maybe a separate stop order if needed, 
-                # or just use client-side logic (monitoring). 
-                # EXCEPT the prompt says "Stop loss automático 2%". 
-                # The most robust way is a bracket order.
-                
-                # Fetch current price to estimate stop price? 
-                # Or just let the risk engine handle the "logic" and pass explicit stop price here?
-                # The execution engine should probably calculate the specific prices.
-                # For the adapter, we should support passing raw parameters.
-                pass
-
-            # Basic implementation for MVP: Market Order
-            # Extended implementation: Limit/Stop
-            
-            # We will interpret 'submit_order' as a raw interface tailored for our strategy.
-            # If we want a stop loss, we probably need a bracket order or OCO.
-            # For simplicity in this adapter, we'll assume the caller handles the logic or we use order_class='bracket' if applicable.
-            # But the signature only asks for symbol, qty, side.
-            # We will use simple market order for now as per "MVP" and "Simple". 
-            # Risk engine rules (max 2% stop loss) might be monitored, or implemented in 'execution'.
-            
-            order = self.api.submit_order(
+            order = self._request(
+                'submit_order',
+                self.api.submit_order,
                 symbol=symbol,
                 qty=qty,
                 side=side,
                 type=type,
-                time_in_force=time_in_force
+                time_in_force=time_in_force,
+                client_order_id=client_order_id
             )
-            logger.info(f"Order submitted: {side} {qty} {symbol} - ID: {order.id}")
-            return order
         except Exception as e:
-            logger.error(f"Error submitting order: {e}")
-            return None
+            if client_order_id is None or not self._is_duplicate_client_order_id(e):
+                raise
+            order = self._request('get_order_by_client_order_id', self.api.get_order_by_client_order_id, client_order_id)
+            logger.info("Order %s was already accepted (client order id %s)", order.id, client_order_id)
+        self.invalidate_snapshot()
+        logger.info("Order submitted: %s %s %s - ID: %s", side, qty, symbol, order.id)
+        return order
+
+    @staticmethod
+    def _is_duplicate_client_order_id(error):
+        # Alpaca answers 422 "client_order_id must be unique" for a resent client_order_id
+        from alpaca_trade_api.rest import APIError
+        return isinstance(error, APIError) and error.status_code == 422 and 'client_order_id' in str(error).lower()
 
     def cancel_order(self, order_id):
         try:
-            self.api.cancel_order(order_id)
-            logger.info(f"Order {order_id} cancelled.")
+            self._request('cancel_order', self.api.cancel_order, order_id)
+            self.invalidate_snapshot()
+            logger.info("Order %s cancelled.", order_id)
         except Exception as e:
-            logger.error(f"Error cancelling order {order_id}: {e}")
+            logger.error("Error cancelling order %s: %s", order_id, e)
+
+    @staticmethod
+    def _alpaca_timeframe(timeframe):
+        # '1Min', '5Min', '15Min', '1Hour', '1Day' (or an alias such as '1d') -> SDK TimeFrame
+        from alpaca_trade_api.rest import TimeFrame, TimeFrameUnit
+        minutes = TIMEFRAME_MINUTES[normalize_timeframe(timeframe)]
+        if minutes == TIMEFRAME_MINUTES["1Day"]:
+            return TimeFrame.Day
+        if minutes % 60 == 0:
+            return TimeFrame(minutes // 60, TimeFrameUnit.Hour)
+        return TimeFrame(minutes, TimeFrameUnit.Minute)
 
-    def get_historical_data(self, symbol, timeframe, limit=100):
+    def get_historical_data(self, symbol, timeframe, limit=100, start=None):
         """
-        Fetches historical data (bars).
+        Fetches historical data (bars) for `timeframe` ('1Min', '5Min', '15Min', '1Hour', '1Day').
+        `symbol` may also be a list of tickers, in which case they are fetched in a single
+        multi-symbol request and a dict of DataFrames keyed by symbol is returned.
+        If `start` (a timestamp) is given, every bar from `start` onwards is returned instead
+        of the last `limit` bars. Returns an empty result if the request failed.
         """
         try:
-            # map timeframe for Alpaca (TimeFrame.Day, etc)
-            tf = TimeFrame.Day # Defaulting for MVP based on config
-            
-            bars = self.api.get_bars(symbol, tf, limit=limit).df
-            if bars.empty:
-                logger.warning(f"No data found for {symbol}")
-                return pd.DataFrame() # return empty
-            return bars
+            return self.fetch_bars(symbol, timeframe, limit, start)
         except Exception as e:
-            logger.error(f"Error fetching historical data: {e}")
-            return pd.DataFrame()
+            logger.error("Error fetching historical data: %s", e)
+            return {} if isinstance(symbol, (list, tuple)) else pd.DataFrame()
+
+    def fetch_bars(self, symbol, timeframe, limit=100, start=None):
+        """
+        Same as get_historical_data, but raises on failure instead of returning an empty
+        result, so callers (e.g. the data providers' circuit breakers) can tell a failing API
+        apart from a symbol with no data.
+        """
+        tf = self._alpaca_timeframe(timeframe)
+        # Bars come back oldest first from `start`, so ask for a calendar window wide enough
+        # for `limit` bars of this timeframe and keep the newest `limit`.
+        window_start = start if start is not None else \
+            pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=lookback_days(normalize_timeframe(timeframe), limit))
+
+        if isinstance(symbol, (list, tuple)):
+            return self._get_historical_data_multi(list(symbol), tf, limit, window_start, trim=start is None)
+
+        bars = self._request('get_bars', self.api.get_bars, symbol, tf, start=pd.Timestamp(window_start).isoformat()).df
+        if bars.empty:
+            if start is None:
+                logger.warning("No data found for %s", symbol)
+            return pd.DataFrame() # return empty
+        return bars if start is not None else bars.tail(limit)
+
+    def _get_historical_data_multi(self, symbols, tf, limit, window_start, trim=True):
+        # For multi-symbol requests Alpaca applies `limit` to the whole response, not per symbol,
+        # so the whole window is requested and each symbol trimmed to its newest `limit` bars.
+        # Incremental fetches (trim=False) return everything from `window_start`, untrimmed.
+        bars = self._request('get_bars', self.api.get_bars, symbols, tf, start=pd.Timestamp(window_start).isoformat()).df
+        if bars.empty:
+            if trim:
+                logger.warning("No data found for %s symbols", len(symbols))
+            return {}
+
+        frames = {}
+        for sym, group in bars.groupby('symbol', sort=False):
+            group = group.drop(columns='symbol')
+            frames[sym] = group.tail(limit) if trim else group
+        missing = len(symbols) - len(frames)
+        if missing and trim:
+            logger.warning("No data found for %s of %s symbols", missing, len(symbols))
+        return frames
@@ -0,0 +1,260 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from config.settings import Config
+from data.timeframes import TIMEFRAME_MINUTES, normalize_timeframe
+
+logger = logging.getLogger("TradingBot")
+
+class SimulatedBroker:
+    """
+    In-process broker with the same interface as AlpacaAdapter, backed by a local matching engine.
+
+    Market orders fill at the last price moved against the order by `slippage_bps`; limit orders
+    fill once the last price crosses the limit. An order only becomes eligible to fill
+    `fill_latency` seconds after submission and stays open until then. Matching runs lazily on
+    every call, so no background thread is needed.
+
+    Prices come from `set_price`/`set_prices`, from the `frames` given at construction
+    (symbol -> daily OHLCV DataFrame), or from a seeded synthetic random walk for unknown symbols;
+    the same frames serve `get_historical_data`. Entities mirror Alpaca's (numeric fields as strings).
+    """
+
+    def __init__(self, initial_cash=Config.SIM_INITIAL_CASH, fill_latency=Config.SIM_FILL_LATENCY,
+                 slippage_bps=Config.SIM_SLIPPAGE_BPS, frames=None, synthetic=True):
+        self.api = self  # truthy "connection" like AlpacaAdapter.api
+        self.session = None
+        self.fill_latency = fill_latency
+        self.slippage_bps = slippage_bps
+        self.frames = dict(frames or {})
+        self.intraday_frames = {}   # (symbol, timeframe) -> synthetic intraday OHLCV
+        self.synthetic = synthetic
+
+        self.cash = float(initial_cash)
+        self.positions = {}     # symbol -> [qty, avg_entry_price]
+        self.market_value = 0.0 # sum of qty * last price over positions, kept incrementally
+        self.prices = {}        # symbol -> last price
+        self.orders = {}        # id -> order namespace
+        self._open = {}         # id -> order namespace (not yet filled or cancelled)
+        self._client_orders = {}  # client_order_id -> order namespace
+        self._due = []          # heap of (eligible_at, seq, order_id)
+        self._resting = {}      # symbol -> {id: order} limit orders waiting for the price
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+
+        for symbol, df in self.frames.items():
+            if not df.empty:
+                self.prices[symbol] = float(df['Close'].iloc[-1])
+        self.account = self.get_account()
+
+    # --- Connection (AlpacaAdapter compatibility) ---
+
+    def connect(self):
+        pass
+
+    def ensure_connected(self):
+        return True
+
+    def invalidate_snapshot(self):
+        pass
+
+    # --- Market data ---
+
+    def set_price(self, symbol, price):
+        self.set_prices({symbol: price})
+
+    def set_prices(self, prices):
+        with self._lock:
+            for symbol, price in prices.items():
+                price = float(price)
+                if symbol in self.positions:
+                    self.market_value += self.positions[symbol][0] * (price - self.prices[symbol])
+                self.prices[symbol] = price
+            self._match()
+            for symbol in prices:
+                for order in list(self._resting.get(symbol, {}).values()):
+                    self._try_fill(order)
+
+    def _synthetic_bars(self, symbol, limit, timeframe="1Day"):
+        # Seeded by symbol and generated at a fixed minimum length, so every request for the
+        # same symbol sees the same history and the same last price. Drift and volatility scale
+        # with the bar length.
+        n = max(limit, Config.BACKTEST_BARS)
+        seed = symbol if timeframe == "1Day" else f"{symbol}/{timeframe}"
+        rng = np.random.default_rng(zlib.crc32(seed.encode()))
+        days = TIMEFRAME_MINUTES[timeframe] / TIMEFRAME_MINUTES["1Day"]
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0003 * days, 0.015 * np.sqrt(days), n)))
+        freq = f"{TIMEFRAME_MINUTES[timeframe]}min"
+        index = pd.date_range(end=pd.Timestamp.now(tz='UTC').floor(freq), periods=n, freq=freq)
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, n)),
+            'High': close * (1 + np.abs(rng.normal(0, 0.005, n))),
+            'Low': close * (1 - np.abs(rng.normal(0, 0.005, n))),
+            'Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, n).astype(float),
+        }, index=index)
+
+    def _bars(self, symbol, limit, start, timeframe="1Day"):
+        timeframe = normalize_timeframe(timeframe)
+        if timeframe != "1Day":
+            # Intraday history is synthetic only; `frames` hold daily bars
+            if not self.synthetic:
+                return pd.DataFrame()
+            key = (symbol, timeframe)
+            if key not in self.intraday_frames or len(self.intraday_frames[key]) < limit:
+                self.intraday_frames[key] = self._synthetic_bars(symbol, limit, timeframe)
+            df = self.intraday_frames[key].rename(columns=str.lower)
+        else:
+            if symbol not in self.frames:
+                if not self.synthetic:
+                    return pd.DataFrame()
+                self.frames[symbol] = self._synthetic_bars(symbol, limit)
+                self.prices.setdefault(symbol, float(self.frames[symbol]['Close'].iloc[-1]))
+            df = self.frames[symbol].rename(columns=str.lower)
+        if start is not None:
+            return df[df.index >= pd.Timestamp(start)]
+        return df.tail(limit)
+
+    def get_historical_data(self, symbol, timeframe, limit=100, start=None):
+        with self._lock:
+            if isinstance(symbol, (list, tuple)):
+                frames = {s: self._bars(s, limit, start, timeframe) for s in symbol}
+                return {s: df for s, df in frames.items() if not df.empty}
+            return self._bars(symbol, limit, start, timeframe)
+
+    # Synthetic data cannot fail, so the raising variant is the same call
+    fetch_bars = get_historical_data
+
+    # --- Account state ---
+
+    def get_account(self):
+        with self._lock:
+            self._match()
+            equity = self.cash + self.market_value
+            return SimpleNamespace(status='ACTIVE', equity=str(equity), cash=str(self.cash),
+                                   buying_power=str(max(self.cash, 0.0)), portfolio_value=str(equity))
+
+    def _position_entity(self, symbol):
+        qty, avg = self.positions[symbol]
+        price = self.prices.get(symbol, avg)
+        return SimpleNamespace(symbol=symbol, qty=str(qty), avg_entry_price=str(avg), current_price=str(price),
+                               market_value=str(qty * price), unrealized_pl=str(qty * (price - avg)),
+                               side='long' if qty > 0 else 'short')
+
+    def get_positions(self):
+        with self._lock:
+            self._match()
+            return [self._position_entity(s) for s in self.positions]
+
+    def get_position(self, symbol):
+        with self._lock:
+            self._match()
+            return self._position_entity(symbol) if symbol in self.positions else None
+
+    def get_open_orders(self):
+        with self._lock:
+            self._match()
+            return list(self._open.values())
+
+    # --- Orders ---
+
+    def place_order(self, symbol, qty, side, type='market', time_in_force='day', limit_price=None, client_order_id=None):
+        if client_order_id is not None:
+            with self._lock:
+                existing = self._client_orders.get(client_order_id)
+            if existing is not None:
+                # A resent order (same client_order_id) returns the original, as on Alpaca
+                return existing
+        if qty <= 0 or side not in ('buy', 'sell'):
+            raise ValueError(f"Invalid order: {side} {qty} {symbol}")
+        if type == 'limit' and limit_price is None:
+            raise ValueError("limit_price is required for limit orders")
+
+        with self._lock:
+            if symbol not in self.prices:
+                self._bars(symbol, 1, None)
+            if symbol not in self.prices:
+                raise ValueError(f"No price available for {symbol}")
+
+            now = time.monotonic()
+            order = SimpleNamespace(
+                id=f"sim-{next(self._seq)}", symbol=symbol, qty=str(qty), side=side, type=type,
+                time_in_force=time_in_force, limit_price=None if limit_price is None else str(limit_price),
+                client_order_id=client_order_id, status='new', filled_qty='0', filled_avg_price=None,
+                submitted_at=pd.Timestamp.now(tz='UTC'), filled_at=None,
+            )
+            self.orders[order.id] = order
+            self._open[order.id] = order
+            if client_order_id is not None:
+                self._client_orders[client_order_id] = order
+            heapq.heappush(self._due, (now + self.fill_latency, next(self._seq), order.id))
+            self._match()
+        logger.debug("Order submitted: %s %s %s - ID: %s", side, qty, symbol, order.id)
+        return order
+
+    def submit_order(self, symbol, qty, side, type='market', time_in_force='day', stop_loss=None):
+        try:
+            return self.place_order(symbol, qty, side, type=type, time_in_force=time_in_force)
+        except Exception as e:
+            logger.error("Error submitting order: %s", e)
+            return None
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self._open.pop(order_id, None)
+            if order is None:
+                logger.error("Error cancelling order %s: not open", order_id)
+                return
+            self._resting.get(order.symbol, {}).pop(order_id, None)
+            order.status = 'canceled'
+
+    def _match(self):
+        # Orders whose latency has elapsed are eligible; market orders fill now, limit orders
+        # fill when marketable and otherwise stay open for later price updates.
+        now = time.monotonic()
+        while self._due and self._due[0][0] <= now:
+            _, _, order_id = heapq.heappop(self._due)
+            order = self._open.get(order_id)
+            if order is not None and not self._try_fill(order):
+                order.status = 'accepted'
+                self._resting.setdefault(order.symbol, {})[order.id] = order
+
+    def _try_fill(self, order):
+        price = self.prices[order.symbol]
+        direction = 1 if order.side == 'buy' else -1
+        if order.type == 'limit':
+            limit = float(order.limit_price)
+            if (direction == 1 and price > limit) or (direction == -1 and price < limit):
+                return False
+            fill_price = price
+        else:
+            fill_price = price * (1 + direction * self.slippage_bps / 10000.0)
+
+        qty = float(order.qty)
+        held, avg = self.positions.get(order.symbol, (0.0, 0.0))
+        new_qty = held + direction * qty
+        if new_qty == 0:
+            self.positions.pop(order.symbol, None)
+        else:
+            # Average price only moves when adding to a position (or flipping through zero)
+            if held == 0 or (held > 0) == (direction > 0):
+                avg = (abs(held) * avg + qty * fill_price) / (abs(held) + qty)
+            elif (new_qty > 0) != (held > 0):
+                avg = fill_price
+            self.positions[order.symbol] = [new_qty, avg]
+        self.cash -= direction * qty * fill_price
+        self.market_value += direction * qty * price
+
+        order.status = 'filled'
+        order.filled_qty = order.qty
+        order.filled_avg_price = str(fill_price)
+        order.filled_at = pd.Timestamp.now(tz='UTC')
+        self._open.pop(order.id, None)
+        self._resting.get(order.symbol, {}).pop(order.id, None)
+        return True
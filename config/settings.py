@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv
+from data.timeframes import normalize_timeframe
 
 # Load environment variables
 load_dotenv()
@@ -12,19 +13,95 @@ class Config:
 
     # Trading Parameters
     SYMBOL = "SPY"
+    # Watchlist scanned each cycle (comma-separated TRADING_SYMBOLS env var, defaults to SYMBOL)
+    SYMBOLS = [s.strip().upper() for s in os.getenv("TRADING_SYMBOLS", SYMBOL).split(",") if s.strip()]
     TIMEFRAME = "1Day"  # Daily candles
+    # Timeframes built locally from one 1-minute download instead of requested from the API
+    # (any spelling, e.g. "5m,1h"). 1Day is left out by default: it would take 390 minute bars
+    # per daily bar, and minute bars include extended hours, so the OHLC would not match the
+    # exchange's daily bars. Add it to build daily bars from the same stream anyway.
+    RESAMPLED_TIMEFRAMES = [normalize_timeframe(tf.strip()) for tf in os.getenv("RESAMPLED_TIMEFRAMES", "5Min,15Min,1Hour").split(",") if tf.strip()]
     SMA_SHORT = 20
     SMA_LONG = 50
+    # Registered strategies run each cycle (comma-separated STRATEGIES env var); they share one indicator engine
+    STRATEGIES = [s.strip() for s in os.getenv("STRATEGIES", "sma_crossover").split(",") if s.strip()]
+    RSI_PERIOD = 14
+    RSI_OVERSOLD = 30
+    RSI_OVERBOUGHT = 70
     
     # Risk Management
     MAX_CAPITAL_PER_TRADE_PCT = 0.05  # 5%
     MAX_TRADES_PER_DAY = 2
     DAILY_STOP_LOSS_PCT = 0.03        # 3%
     STOP_LOSS_PCT = 0.02             # 2% per trade
+    # Portfolio limits on each cycle's batch of signals, as fractions of equity
+    MAX_GROSS_EXPOSURE_PCT = 1.0      # Sum of |position values|
+    MAX_NET_EXPOSURE_PCT = 1.0        # Long minus short
+    MAX_SECTOR_EXPOSURE_PCT = 0.25    # Per sector, for symbols listed in SECTOR_MAP_FILE
+    MAX_CORRELATED_EXPOSURE_PCT = 0.15  # Positions whose returns correlate above CORRELATION_THRESHOLD
+    CORRELATION_THRESHOLD = 0.8
+    CORRELATION_LOOKBACK = 60         # Bars of returns used for correlations
+    SECTOR_MAP_FILE = os.getenv("SECTOR_MAP_FILE", "")  # JSON object {symbol: sector}
 
     # Paths
     LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "trading.log")
+    # Structured JSONL audit stream of signals, risk decisions and orders; empty to disable
+    AUDIT_LOG_FILE = os.getenv("AUDIT_LOG_FILE", os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "audit.jsonl"))
+    AUDIT_LOG_MAX_BYTES = 50 * 2 ** 20  # Rotate (and gzip) the audit stream at 50 MB
+    AUDIT_LOG_BACKUPS = 20
+    BAR_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "bars")
+    RISK_DB_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "state", "risk_state.db")
+    RISK_DB_BUSY_TIMEOUT = 10.0       # Seconds a writer waits for another process's lock
+
+    # Bar Cache
+    USE_BAR_CACHE = os.getenv("USE_BAR_CACHE", "true").lower() == "true"
+
+    # In-memory bar store (data/bar_store.py): newest bars kept per symbol
+    BAR_STORE_CAPACITY = int(os.getenv("BAR_STORE_CAPACITY", "1000"))
+    USE_BAR_STORE = os.getenv("USE_BAR_STORE", "true").lower() == "true"  # Streaming keeps its bars in a BarStore
+
+    # Market Data Providers (Alpaca first, yfinance as the hedge)
+    DATA_HEDGE_DELAY = float(os.getenv("DATA_HEDGE_DELAY", "1.0"))  # Seconds before the next provider is also asked
+    DATA_BATCH_HEDGE_DELAY = float(os.getenv("DATA_BATCH_HEDGE_DELAY", "10.0"))  # Same for multi-symbol batches, which take longer to answer
+    DATA_TIMEOUT = 30.0               # Seconds to wait for any provider to answer
+    BREAKER_FAILURE_THRESHOLD = 3     # Consecutive failures that open a provider's circuit breaker
+    BREAKER_COOLDOWN = 60.0           # Seconds an open breaker skips its provider
 
     # Retry/Connection
     MAX_RETRIES = 3
     RETRY_DELAY = 5
+
+    # Order Submission
+    ORDER_RATE_LIMIT_PER_MIN = int(os.getenv("ORDER_RATE_LIMIT_PER_MIN", "200"))  # Broker request quota
+    ORDER_RATE_BURST = 20             # Orders that may go out back-to-back before throttling
+    ORDER_ACK_TIMEOUT = 60.0          # Seconds a new decision on a symbol waits for its in-flight orders (covers retries)
+
+    # Backtesting
+    BACKTEST_INITIAL_CAPITAL = 100000.0
+    BACKTEST_BARS = 2520              # ~10 years of daily bars
+
+    # Parameter Sweep (SMA_SHORT x SMA_LONG grid)
+    SWEEP_SHORT_WINDOWS = list(range(5, 55, 5))
+    SWEEP_LONG_WINDOWS = list(range(20, 210, 10))
+    SWEEP_WORKERS = os.cpu_count() or 1
+
+    # Streaming
+    STREAM_DATA_FEED = os.getenv("ALPACA_DATA_FEED", "iex")
+    REPLAY_HOST = "127.0.0.1"
+    REPLAY_PORT = 8765
+
+    # Simulated Broker (--simulate)
+    SIM_INITIAL_CASH = 100000.0
+    SIM_FILL_LATENCY = 0.0            # Seconds before a submitted order can fill
+    SIM_SLIPPAGE_BPS = 1.0            # Market orders fill this many basis points against the order
+
+    # Metrics (Prometheus text format)
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))       # Serve /metrics on this port (0 = off)
+    METRICS_FILE = os.getenv("METRICS_FILE")                 # Also write metrics here after each cycle
+
+    # Universe Scanning
+    BATCH_SIZE = 100                  # Symbols per multi-symbol bars request
+    MAX_WORKERS = 8                   # Concurrent data requests / order submissions
+    HTTP_POOL_SIZE = 16               # Keep-alive connections in the shared HTTP session
+    SNAPSHOT_TTL = 5.0                # Seconds account/positions/open orders snapshots stay fresh
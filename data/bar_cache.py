@@ -0,0 +1,146 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from config.settings import Config
+
+logger = logging.getLogger("TradingBot")
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class BarCache:
+    """
+    Persistent columnar cache of OHLCV bars, one directory per timeframe and symbol.
+
+    Each symbol is stored as two append-only raw files that are memory-mapped on read:
+        index.i8 - bar timestamps as int64 nanoseconds since epoch (UTC)
+        ohlcv.f8 - row-major float64 matrix of Open, High, Low, Close, Volume
+
+    New bars are appended with a single small write, and reads wrap the memory map in a
+    DataFrame without copying it.
+    """
+
+    INDEX_FILE = "index.i8"
+    VALUES_FILE = "ohlcv.f8"
+    ROW_BYTES = len(OHLCV_COLUMNS) * 8
+
+    def __init__(self, root=Config.BAR_CACHE_DIR):
+        self.root = root
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, timeframe, symbol.replace('/', '_'))
+
+    def _paths(self, symbol, timeframe):
+        path = self._dir(symbol, timeframe)
+        return os.path.join(path, self.INDEX_FILE), os.path.join(path, self.VALUES_FILE)
+
+    def count(self, symbol, timeframe):
+        """
+        Number of bars cached for symbol/timeframe.
+        """
+        index_path, values_path = self._paths(symbol, timeframe)
+        if not os.path.exists(index_path) or not os.path.exists(values_path):
+            return 0
+        return min(os.path.getsize(index_path) // 8, os.path.getsize(values_path) // self.ROW_BYTES)
+
+    def last_timestamp(self, symbol, timeframe):
+        """
+        Timestamp of the newest cached bar, or None if nothing is cached.
+        """
+        n = self.count(symbol, timeframe)
+        if n == 0:
+            return None
+        index_path, _ = self._paths(symbol, timeframe)
+        with open(index_path, 'rb') as f:
+            f.seek((n - 1) * 8)
+            last = np.frombuffer(f.read(8), dtype=np.int64)[0]
+        return pd.Timestamp(int(last), unit='ns', tz='UTC')
+
+    def read(self, symbol, timeframe, limit=None):
+        """
+        Returns the cached bars (the newest `limit` if given) as an OHLCV DataFrame.
+        The values are a read-only view over the memory-mapped file, not a copy.
+        """
+        n = self.count(symbol, timeframe)
+        if n == 0:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        index_path, values_path = self._paths(symbol, timeframe)
+        start = max(0, n - limit) if limit else 0
+        index = np.memmap(index_path, dtype=np.int64, mode='r', offset=start * 8, shape=(n - start,))
+        values = np.memmap(values_path, dtype=np.float64, mode='r', offset=start * self.ROW_BYTES,
+                           shape=(n - start, len(OHLCV_COLUMNS)))
+
+        dt_index = pd.DatetimeIndex(index.view('datetime64[ns]')).tz_localize('UTC')
+        return pd.DataFrame(values, index=dt_index, columns=OHLCV_COLUMNS, copy=False)
+
+    def append(self, symbol, timeframe, df):
+        """
+        Merges bars into the cache. Only bars newer than the last cached timestamp are appended;
+        a bar with the same timestamp as the last cached one (a bar that was still forming when it
+        was cached) overwrites it in place.
+
+        Returns:
+            int: Number of bars appended.
+        """
+        if df.empty:
+            return 0
+
+        timestamps, values = self._to_arrays(df)
+        n = self._repair(symbol, timeframe)
+        index_path, values_path = self._paths(symbol, timeframe)
+
+        if n > 0:
+            last = self.last_timestamp(symbol, timeframe).value
+            same = timestamps == last
+            if same.any():
+                with open(values_path, 'r+b') as f:
+                    f.seek((n - 1) * self.ROW_BYTES)
+                    f.write(values[same][-1].tobytes())
+            newer = timestamps > last
+            timestamps, values = timestamps[newer], values[newer]
+            if len(timestamps) == 0:
+                return 0
+
+        os.makedirs(self._dir(symbol, timeframe), exist_ok=True)
+        # Values are written before the index so a crash in between leaves orphan rows that
+        # `_repair` trims, never an index entry without its bar.
+        with open(values_path, 'ab') as f:
+            f.write(values.tobytes())
+        with open(index_path, 'ab') as f:
+            f.write(timestamps.tobytes())
+        return len(timestamps)
+
+    def replace(self, symbol, timeframe, df):
+        """
+        Replaces the cached history for symbol/timeframe with `df`.
+        """
+        index_path, values_path = self._paths(symbol, timeframe)
+        for path in (index_path, values_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return self.append(symbol, timeframe, df)
+
+    def _repair(self, symbol, timeframe):
+        # Trims a partially written trailing row left by an interrupted append.
+        index_path, values_path = self._paths(symbol, timeframe)
+        n = self.count(symbol, timeframe)
+        for path, size in ((index_path, n * 8), (values_path, n * self.ROW_BYTES)):
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                logger.warning("Repairing bar cache file %s", path)
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+        return n
+
+    @staticmethod
+    def _to_arrays(df):
+        index = pd.DatetimeIndex(df.index)
+        index = index.tz_convert('UTC') if index.tz is not None else index.tz_localize('UTC')
+        timestamps = index.as_unit('ns').asi8.astype(np.int64)
+        values = np.ascontiguousarray(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64))
+
+        # Appends must be strictly increasing in time
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        return timestamps[keep], values[keep]
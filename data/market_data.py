@@ -1,50 +1,239 @@
+import threading
 import pandas as pd
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from broker.alpaca_adapter import AlpacaAdapter
+from data.bar_cache import BarCache, OHLCV_COLUMNS
+from data.providers import DataProvider, HedgedFetcher
+from data.resample import resample_bars
+from data.timeframes import (BASE_TIMEFRAME, YFINANCE_INTERVALS, YFINANCE_MAX_DAYS, normalize_timeframe,
+                             lookback_days, base_bars_needed)
 from config.settings import Config
 import logging
 
 logger = logging.getLogger("TradingBot")
 
 class MarketData:
-    def __init__(self, use_alpaca=True):
-        self.alpaca = AlpacaAdapter() if use_alpaca else None
+    """
+    OHLCV data from an ordered list of providers (Alpaca, then yfinance by default).
+
+    Every request is hedged: the first provider is asked, and if it has not answered within
+    Config.DATA_HEDGE_DELAY (Config.DATA_BATCH_HEDGE_DELAY for a multi-symbol batch) the next
+    one is asked too; whichever returns data first wins. Each
+    provider has a circuit breaker, so one that keeps failing is skipped for
+    Config.BREAKER_COOLDOWN seconds. Other providers (e.g. stubs with injected delays in tests)
+    can be passed as `providers`; `use_fallback=False` keeps to Alpaca (or the adapter) alone.
+    """
+
+    def __init__(self, use_alpaca=True, adapter=None, use_cache=Config.USE_BAR_CACHE, providers=None,
+                 hedge_delay=Config.DATA_HEDGE_DELAY, use_fallback=True, batch_hedge_delay=Config.DATA_BATCH_HEDGE_DELAY):
+        # Reuse the caller's broker adapter when given instead of opening a second connection
+        self.alpaca = (adapter or AlpacaAdapter()) if use_alpaca else None
         self.use_alpaca = use_alpaca
+        self.cache = BarCache() if use_cache else None
+        # A hedged Alpaca request that lost the race still updates the cache when it finishes,
+        # possibly while the next request for the same symbols runs; updates take turns
+        self._cache_lock = threading.Lock()
+        if providers is None:
+            providers = []
+            if use_fallback or not (self.use_alpaca and self.alpaca):
+                providers.append(DataProvider("yfinance", self._fetch_yfinance, self._fetch_yfinance_batch))
+            if self.use_alpaca and self.alpaca:
+                providers.insert(0, DataProvider("alpaca", self._fetch_alpaca_bars, self._fetch_batch))
+        self.providers = providers
+        self.fetcher = HedgedFetcher(providers, hedge_delay=hedge_delay)
+        self.batch_hedge_delay = batch_hedge_delay
 
-    def get_market_data(self, symbol, timeframe='1d', limit=100):
+    def get_market_data(self, symbol, timeframe='1Day', limit=100):
         """
         Fetches historical market data and returns a clean DataFrame with OHLCV structure.
         Ensures columns are: Open, High, Low, Close, Volume.
+        Timeframes in Config.RESAMPLED_TIMEFRAMES are built from cached 1-minute bars.
         """
         try:
-            if self.use_alpaca and self.alpaca:
-                df = self.alpaca.get_historical_data(symbol, timeframe, limit)
-                if not df.empty:
-                    # Alpaca returns columns like 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap'
-                    # Standardize to Capitalized
-                    df = df.rename(columns={
-                        'open': 'Open',
-                        'high': 'High', 
-                        'low': 'Low', 
-                        'close': 'Close', 
-                        'volume': 'Volume'
-                    })
-                    return df[['Open', 'High', 'Low', 'Close', 'Volume']]
-            
-            # Fallback to yfinance
-            logger.info(f"Using yfinance fallback for {symbol}")
-            ticker = yf.Ticker(symbol)
-            # map timeframe for yf
-            yf_tf = '1d' if timeframe == '1Day' else timeframe
-            df = ticker.history(period='1mo', interval=yf_tf) # limit 100 approx 1mo
-            
-            if df.empty:
-                logger.error(f"No data found for {symbol} via yfinance either.")
+            timeframe = normalize_timeframe(timeframe)
+            df = self.fetcher.fetch(lambda provider: provider.fetch(symbol, timeframe, limit))
+            if df is None:
+                logger.error("No data found for %s from any provider.", symbol)
                 return pd.DataFrame()
-            
-            return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+            return df
 
         except Exception as e:
-            logger.error(f"Error in data layer: {e}")
+            logger.error("Error in data layer: %s", e)
             return pd.DataFrame()
 
+    def get_market_data_batch(self, symbols, timeframe='1Day', limit=100):
+        """
+        Fetches OHLCV data for a whole watchlist.
+        Symbols are split into batches of Config.BATCH_SIZE, each batch is a single hedged
+        multi-symbol request, and batches run concurrently on a pool of Config.MAX_WORKERS threads.
+        Symbols missing from the answers are retried one by one on the remaining providers.
+
+        Returns:
+            dict: symbol -> OHLCV DataFrame. Symbols with no data at all are omitted.
+        """
+        results = {}
+        try:
+            timeframe = normalize_timeframe(timeframe)
+            with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as pool:
+                batches = [symbols[i:i + Config.BATCH_SIZE] for i in range(0, len(symbols), Config.BATCH_SIZE)]
+                fetch_batch = lambda batch: self.fetcher.fetch(lambda provider: provider.fetch_batch(batch, timeframe, limit),
+                                                               hedge_delay=self.batch_hedge_delay)
+                for frames in pool.map(fetch_batch, batches):
+                    results.update(frames or {})
+
+                missing = [s for s in symbols if s not in results]
+                fallback = self.providers[1:]
+                if missing and fallback:
+                    logger.info("Using fallback providers for %s symbols", len(missing))
+                    fetch_one = lambda s: self.fetcher.fetch(lambda provider: provider.fetch(s, timeframe, limit), fallback)
+                    for sym, df in zip(missing, pool.map(fetch_one, missing)):
+                        if df is not None:
+                            results[sym] = df
+
+        except Exception as e:
+            logger.error("Error in data layer: %s", e)
+
+        return results
+
+    def get_market_data_timeframes(self, symbols, timeframes, limit=100):
+        """
+        Fetches several timeframes for a watchlist at once.
+        All timeframes in Config.RESAMPLED_TIMEFRAMES (and 1Min itself) are built from a single
+        1-minute download sized for the longest of them. Separate `get_market_data_batch`
+        calls share that download only through the bar cache, so without one (`use_cache=False`,
+        as in simulated mode) this is the way to avoid fetching the minute history once per
+        timeframe.
+
+        Returns:
+            dict: timeframe -> {symbol -> OHLCV DataFrame}
+        """
+        timeframes = [normalize_timeframe(tf) for tf in timeframes]
+        from_minute = [tf for tf in timeframes if tf in Config.RESAMPLED_TIMEFRAMES or tf == BASE_TIMEFRAME]
+
+        results = {}
+        if from_minute:
+            needed = max(base_bars_needed(tf, limit) for tf in from_minute)
+            minute = self.get_market_data_batch(symbols, BASE_TIMEFRAME, needed)
+            for tf in from_minute:
+                results[tf] = {s: resample_bars(df, tf).tail(limit) for s, df in minute.items()}
+        for tf in timeframes:
+            if tf not in results:
+                results[tf] = self.get_market_data_batch(symbols, tf, limit)
+        return results
+
+    def close(self):
+        self.fetcher.close()
+
+    # --- Providers: each raises on failure and returns an empty result when it has no data ---
+
+    def _fetch_alpaca_bars(self, symbol, timeframe, limit):
+        if timeframe not in Config.RESAMPLED_TIMEFRAMES:
+            return self._fetch_alpaca(symbol, timeframe, limit)
+        minute = self._fetch_alpaca(symbol, BASE_TIMEFRAME, base_bars_needed(timeframe, limit))
+        return resample_bars(minute, timeframe).tail(limit)
+
+    def _fetch_batch(self, symbols, timeframe, limit):
+        if timeframe not in Config.RESAMPLED_TIMEFRAMES:
+            return self._fetch_alpaca_batch(symbols, timeframe, limit)
+        minute = self._fetch_alpaca_batch(symbols, BASE_TIMEFRAME, base_bars_needed(timeframe, limit))
+        return {s: resample_bars(df, timeframe).tail(limit) for s, df in minute.items()}
+
+    def _fetch_alpaca(self, symbol, timeframe, limit):
+        if not self.cache:
+            df = self.alpaca.fetch_bars(symbol, timeframe, limit)
+            return self._standardize(df) if not df.empty else df
+
+        # Incremental fetch: only bars from the last cached one onwards (it may have been still forming)
+        if self.cache.count(symbol, timeframe) >= limit:
+            df = self.alpaca.fetch_bars(symbol, timeframe, limit, start=self.cache.last_timestamp(symbol, timeframe))
+            with self._cache_lock:
+                if not df.empty:
+                    self.cache.append(symbol, timeframe, self._standardize(df))
+                return self.cache.read(symbol, timeframe, limit)
+
+        df = self.alpaca.fetch_bars(symbol, timeframe, limit)
+        if df.empty:
+            return df
+        with self._cache_lock:
+            self.cache.replace(symbol, timeframe, self._standardize(df))
+            return self.cache.read(symbol, timeframe, limit)
+
+    def _fetch_alpaca_batch(self, symbols, timeframe, limit):
+        if not self.cache:
+            frames = self.alpaca.fetch_bars(symbols, timeframe, limit)
+            return {sym: self._standardize(df) for sym, df in frames.items()}
+
+        # Symbols already holding `limit` cached bars only fetch what is new since their last bar;
+        # the rest (first run, or a larger `limit`) get a full download that replaces their cache.
+        # A late write from a request that lost its hedge is harmless: these are the same raw
+        # Alpaca bars, `append` only adds bars newer than the cache's last one and `replace`
+        # writes a complete history, so whichever update runs last leaves a correct cache.
+        warm = [s for s in symbols if self.cache.count(s, timeframe) >= limit]
+        warm_set = set(warm)
+        cold = [s for s in symbols if s not in warm_set]
+
+        if cold:
+            frames = self.alpaca.fetch_bars(cold, timeframe, limit)
+            with self._cache_lock:
+                for sym, df in frames.items():
+                    self.cache.replace(sym, timeframe, self._standardize(df))
+        if warm:
+            start = min(self.cache.last_timestamp(s, timeframe) for s in warm)
+            frames = self.alpaca.fetch_bars(warm, timeframe, limit, start=start)
+            with self._cache_lock:
+                for sym, df in frames.items():
+                    self.cache.append(sym, timeframe, self._standardize(df))
+
+        with self._cache_lock:
+            return {s: self.cache.read(s, timeframe, limit) for s in symbols if self.cache.count(s, timeframe)}
+
+    @staticmethod
+    def _standardize(df):
+        # Alpaca returns columns like 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap'
+        # Standardize to Capitalized
+        df = df.rename(columns={
+            'open': 'Open',
+            'high': 'High',
+            'low': 'Low',
+            'close': 'Close',
+            'volume': 'Volume'
+        })
+        return df[OHLCV_COLUMNS]
+
+    @staticmethod
+    def _yfinance_window(timeframe, limit):
+        # yfinance serves every supported timeframe natively, but intraday history is capped
+        days = lookback_days(timeframe, limit)
+        if timeframe in YFINANCE_MAX_DAYS:
+            days = min(days, YFINANCE_MAX_DAYS[timeframe] - 1)
+        start = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)).strftime('%Y-%m-%d')
+        return start, YFINANCE_INTERVALS[timeframe]
+
+    def _fetch_yfinance(self, symbol, timeframe, limit=100):
+        # Imported on first use only: yfinance is slow to import and rarely needed.
+        # Unadjusted prices, like Alpaca's bars, so a hedged answer matches the cached history
+        # (OHLCV_COLUMNS takes the raw Close, not 'Adj Close').
+        import yfinance as yf
+        start, interval = self._yfinance_window(timeframe, limit)
+        df = yf.Ticker(symbol).history(start=start, interval=interval, auto_adjust=False, raise_errors=True)
+        return df[OHLCV_COLUMNS].tail(limit) if not df.empty else pd.DataFrame()
+
+    def _fetch_yfinance_batch(self, symbols, timeframe, limit=100):
+        import yfinance as yf
+        start, interval = self._yfinance_window(timeframe, limit)
+        data = yf.download(list(symbols), start=start, interval=interval, group_by='ticker', auto_adjust=False,
+                           progress=False)
+        if data is None or data.empty:
+            return {}
+
+        frames = {}
+        if isinstance(data.columns, pd.MultiIndex):
+            tickers = set(data.columns.get_level_values(0))
+            for sym in symbols:
+                if sym in tickers:
+                    df = data[sym][OHLCV_COLUMNS].dropna(how='all')
+                    if not df.empty:
+                        frames[sym] = df.tail(limit)
+        elif len(symbols) == 1:
+            frames[symbols[0]] = data[OHLCV_COLUMNS].dropna(how='all').tail(limit)
+        return frames
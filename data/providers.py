@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.settings import Config
+from monitoring.metrics import DATA_REQUESTS, DATA_LATENCY, BREAKER_TRIPS
+
+logger = logging.getLogger("TradingBot")
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and the provider is skipped
+    for `cooldown` seconds. Then one trial request is let through (half-open): success closes
+    the breaker, failure opens it for another cool-down.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=Config.BREAKER_FAILURE_THRESHOLD, cooldown=Config.BREAKER_COOLDOWN,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        True if a request may be sent now. Moves an open breaker to half-open (one trial
+        request) once its cool-down has passed.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker for %s opened after %s failure(s); cooling down %ss",
+                                   self.name, self.failures, self.cooldown)
+                    BREAKER_TRIPS.inc(provider=self.name)
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+class DataProvider:
+    """
+    A named OHLCV source with its own circuit breaker.
+
+    `fetch(symbol, timeframe, limit)` returns a DataFrame (empty when the source has no data)
+    and raises on failure. `fetch_batch(symbols, timeframe, limit)` returns a dict of
+    DataFrames; without one, batches are fetched symbol by symbol.
+    """
+
+    def __init__(self, name, fetch, fetch_batch=None, breaker=None):
+        self.name = name
+        self._fetch = fetch
+        self._fetch_batch = fetch_batch
+        self.breaker = breaker or CircuitBreaker(name)
+
+    def fetch(self, symbol, timeframe, limit):
+        return self._fetch(symbol, timeframe, limit)
+
+    def fetch_batch(self, symbols, timeframe, limit):
+        if self._fetch_batch is not None:
+            return self._fetch_batch(symbols, timeframe, limit)
+        frames = {}
+        for symbol in symbols:
+            df = self._fetch(symbol, timeframe, limit)
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+class _Attempt:
+    # One provider call within a hedged request. Its outcome goes to the breaker and metrics
+    # exactly once: when the call finishes, or when the request times out first.
+    __slots__ = ('provider', '_settled', '_lock')
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def settle(self):
+        """
+        True for the first caller only.
+        """
+        with self._lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+class HedgedFetcher:
+    """
+    Runs a request against an ordered list of providers with hedging.
+
+    The first available provider (breaker closed or half-open) is called. If it has not
+    answered within `hedge_delay` seconds, the next one is started as well, and so on; the
+    first non-empty answer wins. A provider that fails or comes back empty hands over to the
+    next one immediately. Losing requests finish in the background and only update their
+    provider's breaker. Providers still running after `timeout` seconds count as failed, and
+    their late answers are then ignored.
+    """
+
+    def __init__(self, providers, hedge_delay=Config.DATA_HEDGE_DELAY, timeout=Config.DATA_TIMEOUT, max_workers=None):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        # Losers keep running after a request returns, so leave room beyond the callers' own pools
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or 2 * Config.MAX_WORKERS * max(1, len(self.providers)),
+                                        thread_name_prefix="DataProvider")
+
+    def _call(self, attempt, call):
+        provider = attempt.provider
+        start = time.perf_counter()
+        try:
+            result = call(provider)
+        except Exception:
+            if attempt.settle():
+                provider.breaker.record_failure()
+                DATA_REQUESTS.inc(provider=provider.name, result="error")
+            raise
+        finally:
+            DATA_LATENCY.observe(time.perf_counter() - start, provider=provider.name)
+        if attempt.settle():
+            provider.breaker.record_success()
+            DATA_REQUESTS.inc(provider=provider.name, result="success" if len(result) else "empty")
+        return result
+
+    def fetch(self, call, providers=None, hedge_delay=None):
+        """
+        Args:
+            call: Function of a DataProvider making the request, e.g.
+                `lambda p: p.fetch(symbol, timeframe, limit)`.
+            providers (list): Providers to use, in order of preference (default: all).
+            hedge_delay (float): Overrides `self.hedge_delay` for this request.
+
+        Returns:
+            The first non-empty result, else None.
+        """
+        pending = list(self.providers if providers is None else providers)
+        hedge_delay = self.hedge_delay if hedge_delay is None else hedge_delay
+        running = {}
+        deadline = time.monotonic() + self.timeout
+
+        def launch():
+            # Starts the next provider whose breaker lets it through
+            while pending:
+                provider = pending.pop(0)
+                if provider.breaker.allow():
+                    attempt = _Attempt(provider)
+                    running[self._pool.submit(self._call, attempt, call)] = attempt
+                    return True
+                DATA_REQUESTS.inc(provider=provider.name, result="skipped")
+            return False
+
+        launch()
+        while running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(running), timeout=min(hedge_delay, remaining) if pending else remaining,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # The running providers are slow: hedge with the next one
+                if launch():
+                    logger.info("Hedging data request to %s after %ss", running[list(running)[-1]].provider.name, hedge_delay)
+                continue
+            for future in done:
+                provider = running.pop(future).provider
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("Data provider %s failed: %s", provider.name, e)
+                    continue
+                if len(result):
+                    return result
+            if not running:
+                launch()
+
+        for attempt in running.values():
+            # A call that finishes just now has already been counted
+            if attempt.settle():
+                provider = attempt.provider
+                logger.warning("Data provider %s timed out after %ss", provider.name, self.timeout)
+                provider.breaker.record_failure()
+                DATA_REQUESTS.inc(provider=provider.name, result="timeout")
+        return None
+
+    def close(self):
+        self._pool.shutdown(wait=False)
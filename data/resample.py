@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from data.bar_cache import OHLCV_COLUMNS
+from data.timeframes import TIMEFRAME_MINUTES
+
+def resample_bars(df, timeframe):
+    """
+    Aggregates 1-minute OHLCV bars into `timeframe` bars (5Min, 15Min, 1Hour, 1Day).
+
+    Bars are grouped into fixed UTC buckets labelled by their start, like Alpaca's own
+    aggregates: Open is the first open, High the max, Low the min, Close the last close and
+    Volume the sum. Buckets without any minute bar are skipped rather than filled, and the
+    newest bucket may still be forming.
+
+    The input must be sorted by time. Everything runs as a handful of NumPy reductions over
+    contiguous bucket boundaries, so it is cheap enough to run on every cycle.
+    """
+    minutes = TIMEFRAME_MINUTES[timeframe]
+    if df.empty or minutes == 1:
+        return df
+
+    index = pd.DatetimeIndex(df.index)
+    stamps = index.as_unit('ns').asi8
+    bucket_ns = minutes * 60 * 10 ** 9
+    buckets = stamps // bucket_ns
+
+    # First row of each bucket; rows are sorted, so a bucket is a contiguous run
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    values = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+    out = np.empty((len(starts), len(OHLCV_COLUMNS)))
+    out[:, 0] = values[starts, 0]
+    out[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    out[:, 3] = values[ends, 3]
+    out[:, 4] = np.add.reduceat(values[:, 4], starts)
+
+    out_index = pd.DatetimeIndex((buckets[starts] * bucket_ns).view('datetime64[ns]')).tz_localize('UTC')
+    if index.tz is None:
+        out_index = out_index.tz_localize(None)
+    elif str(index.tz) != 'UTC':
+        out_index = out_index.tz_convert(index.tz)
+    return pd.DataFrame(out, index=out_index, columns=OHLCV_COLUMNS)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import time
+import pandas as pd
+from config.settings import Config
+from data.bar_cache import OHLCV_COLUMNS
+
+logger = logging.getLogger("TradingBot")
+
+# Bars are passed to handlers as dicts:
+#   {"symbol", "timestamp" (pd.Timestamp, UTC), "open", "high", "low", "close", "volume", "received_at"}
+# where received_at is time.perf_counter() when the bar reached this process.
+
+def _make_bar(symbol, timestamp, open_, high, low, close, volume):
+    ts = pd.Timestamp(timestamp)
+    return {
+        "symbol": symbol,
+        "timestamp": ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC'),
+        "open": float(open_),
+        "high": float(high),
+        "low": float(low),
+        "close": float(close),
+        "volume": float(volume),
+        "received_at": time.perf_counter(),
+    }
+
+class AlpacaBarStream:
+    """
+    Live bar subscriber on Alpaca's market data websocket.
+    Every bar is pushed to the async handler as soon as it arrives.
+    """
+
+    def __init__(self, data_feed=Config.STREAM_DATA_FEED):
+        from alpaca_trade_api.stream import Stream
+        self.stream = Stream(Config.API_KEY, Config.API_SECRET, base_url=Config.BASE_URL, data_feed=data_feed)
+
+    def subscribe_bars(self, handler, *symbols):
+        async def on_bar(bar):
+            ts = bar.timestamp
+            ts = ts.to_datetime() if hasattr(ts, 'to_datetime') else ts
+            await handler(_make_bar(bar.symbol, ts, bar.open, bar.high, bar.low, bar.close, bar.volume))
+
+        self.stream.subscribe_bars(on_bar, *symbols)
+
+    def run(self):
+        self.stream.run()
+
+    def stop(self):
+        self.stream.stop()
+
+class ReplayServer:
+    """
+    Local bar server for offline and load testing of the streaming mode.
+
+    Streams recorded bars in timestamp order as newline-delimited JSON to every client that
+    connects, after the client sends its subscription line: {"subscribe": ["SPY", ...]} or
+    {"subscribe": ["*"]}. `speed` is the number of bars per second to send (0 = as fast as
+    possible), which makes the server usable as a load generator.
+    """
+
+    def __init__(self, bars, host=Config.REPLAY_HOST, port=Config.REPLAY_PORT, speed=0):
+        self.bars = sorted(bars, key=lambda b: b["timestamp"])
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self._server = None
+
+    @classmethod
+    def from_frames(cls, frames, **kwargs):
+        """
+        Builds a server from a dict of symbol -> OHLCV DataFrame (e.g. MarketData or BarCache output).
+        """
+        bars = []
+        for symbol, df in frames.items():
+            index = pd.DatetimeIndex(df.index)
+            index = index.tz_convert('UTC') if index.tz is not None else index.tz_localize('UTC')
+            for ts, row in zip(index, df[OHLCV_COLUMNS].itertuples(index=False)):
+                bars.append({"symbol": symbol, "timestamp": ts.isoformat(), "open": float(row[0]), "high": float(row[1]),
+                             "low": float(row[2]), "close": float(row[3]), "volume": float(row[4])})
+        return cls(bars, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """
+        Builds a server from a recording with columns symbol,timestamp,open,high,low,close,volume.
+        """
+        df = pd.read_csv(path)
+        df.columns = [c.lower() for c in df.columns]
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).map(lambda ts: ts.isoformat())
+        return cls(df[["symbol", "timestamp", "open", "high", "low", "close", "volume"]].to_dict("records"), **kwargs)
+
+    async def _serve_client(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            symbols = set(request.get("subscribe", ["*"]))
+            interval = 1.0 / self.speed if self.speed else 0
+            for i, bar in enumerate(self.bars):
+                if "*" not in symbols and bar["symbol"] not in symbols:
+                    continue
+                writer.write(json.dumps(bar).encode() + b"\n")
+                if interval:
+                    await writer.drain()
+                    await asyncio.sleep(interval)
+                elif i % 1000 == 0:
+                    await writer.drain()
+            await writer.drain()
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning("Replay client disconnected: %s", e)
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Replay server streaming %s bars on %s:%s", len(self.bars), self.host, self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+class ReplayBarStream:
+    """
+    Client for ReplayServer with the same interface as AlpacaBarStream, so the streaming
+    mode runs unchanged against recorded data. `run()` returns once the replay is exhausted.
+    """
+
+    def __init__(self, host=Config.REPLAY_HOST, port=Config.REPLAY_PORT):
+        self.host = host
+        self.port = port
+        self._handlers = []
+        self._stopped = False
+
+    def subscribe_bars(self, handler, *symbols):
+        self._handlers.append((handler, set(symbols) or {"*"}))
+
+    async def run_async(self):
+        symbols = set().union(*(syms for _, syms in self._handlers)) if self._handlers else {"*"}
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=2 ** 20)
+        try:
+            writer.write(json.dumps({"subscribe": sorted(symbols)}).encode() + b"\n")
+            await writer.drain()
+            while not self._stopped:
+                line = await reader.readline()
+                if not line:
+                    break
+                raw = json.loads(line)
+                bar = _make_bar(raw["symbol"], raw["timestamp"], raw["open"], raw["high"], raw["low"], raw["close"], raw["volume"])
+                for handler, wanted in self._handlers:
+                    if "*" in wanted or bar["symbol"] in wanted:
+                        await handler(bar)
+        finally:
+            writer.close()
+
+    def run(self):
+        asyncio.run(self.run_async())
+
+    def stop(self):
+        self._stopped = True
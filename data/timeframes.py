@@ -0,0 +1,58 @@
+import math
+
+# Canonical timeframe names (Alpaca style, as in Config.TIMEFRAME) and their bar length in minutes
+TIMEFRAME_MINUTES = {
+    "1Min": 1,
+    "5Min": 5,
+    "15Min": 15,
+    "1Hour": 60,
+    "1Day": 1440,
+}
+
+# Spellings accepted from callers and config, e.g. yfinance style '1d' or '5m'
+TIMEFRAME_ALIASES = {
+    "1m": "1Min", "1min": "1Min", "minute": "1Min",
+    "5m": "5Min", "5min": "5Min",
+    "15m": "15Min", "15min": "15Min",
+    "1h": "1Hour", "60m": "1Hour", "1hour": "1Hour", "hour": "1Hour",
+    "1d": "1Day", "1day": "1Day", "day": "1Day",
+}
+
+BASE_TIMEFRAME = "1Min"     # Resampled timeframes are built from this stream
+SESSION_MINUTES = 390       # Regular US equity session, 09:30-16:00 ET
+
+# yfinance interval names and how far back each intraday interval can be requested
+YFINANCE_INTERVALS = {"1Min": "1m", "5Min": "5m", "15Min": "15m", "1Hour": "1h", "1Day": "1d"}
+YFINANCE_MAX_DAYS = {"1Min": 7, "5Min": 60, "15Min": 60, "1Hour": 730}
+
+def normalize_timeframe(timeframe):
+    """
+    Returns the canonical name for `timeframe` ('1d' -> '1Day', '5m' -> '5Min', ...).
+    Raises ValueError for timeframes that are not supported.
+    """
+    if timeframe in TIMEFRAME_MINUTES:
+        return timeframe
+    canonical = TIMEFRAME_ALIASES.get(str(timeframe).lower())
+    if canonical is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return canonical
+
+def bars_per_session(timeframe):
+    """
+    Bars of `timeframe` in one regular session (the partial first hour counts as a bar).
+    """
+    return max(1, math.ceil(SESSION_MINUTES / TIMEFRAME_MINUTES[timeframe]))
+
+def lookback_days(timeframe, limit):
+    """
+    Calendar days to request so that at least `limit` bars of `timeframe` come back,
+    allowing for weekends and holidays.
+    """
+    sessions = math.ceil(limit / bars_per_session(timeframe))
+    return int(sessions * 1.5) + 10
+
+def base_bars_needed(timeframe, limit):
+    """
+    1-minute bars needed to build `limit` bars of `timeframe`.
+    """
+    return limit * min(TIMEFRAME_MINUTES[timeframe], SESSION_MINUTES)
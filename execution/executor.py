@@ -1,36 +1,120 @@
 import logging
+import threading
+from concurrent.futures import wait
 from config.settings import Config
 from broker.alpaca_adapter import AlpacaAdapter
 from risk.risk_engine import RiskEngine
+from execution.order_pipeline import OrderPipeline
+from risk.stop_monitor import StopMonitor
+from monitoring.metrics import span, ORDERS
+from monitoring.logging_setup import audit
 import math
 
 logger = logging.getLogger("TradingBot")
 
 class Executor:
-    def __init__(self, broker: AlpacaAdapter, risk_engine: RiskEngine):
+    def __init__(self, broker: AlpacaAdapter, risk_engine: RiskEngine, pipeline: OrderPipeline = None,
+                 stop_monitor: StopMonitor = None):
         self.broker = broker
         self.risk_engine = risk_engine
+        self.pipeline = pipeline
+        # Optional: new longs get a stop Config.STOP_LOSS_PCT below their entry price
+        self.stop_monitor = stop_monitor
+        # symbol -> pipeline futures of orders not yet acknowledged by the broker
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
 
-    def execute_signal(self, signal, current_price):
+    def _track(self, symbol, future):
+        with self._in_flight_lock:
+            self._in_flight.setdefault(symbol, set()).add(future)
+        future.add_done_callback(lambda f: self._untrack(symbol, f))
+
+    def _untrack(self, symbol, future):
+        with self._in_flight_lock:
+            futures = self._in_flight.get(symbol)
+            if futures is not None:
+                futures.discard(future)
+                if not futures:
+                    del self._in_flight[symbol]
+
+    def net_position(self, symbol, price=None):
         """
-        Executes a trade based on the generated signal.
-        
-        Args:
-            signal (dict): The signal from Strategy Engine.
-            current_price (float): The latest price of the asset.
+        Position in `symbol` including every order already sent for it: waits (up to
+        Config.ORDER_ACK_TIMEOUT) for the symbol's orders still queued on the pipeline, then
+        adds the broker's open orders, which the positions snapshot does not show until filled.
+
+        Returns:
+            tuple: (qty, avg_entry_price); qty is signed (negative when short), the entry price
+                is None when flat. Unfilled buys are priced at `price`.
+            None if the symbol's orders were not acknowledged in time.
         """
+        with self._in_flight_lock:
+            futures = list(self._in_flight.get(symbol, ()))
+        if futures:
+            _, not_done = wait(futures, timeout=Config.ORDER_ACK_TIMEOUT)
+            if not_done:
+                return None
+
+        position = self.broker.get_position(symbol)
+        held = float(position.qty) if position else 0.0
+        entry = float(position.avg_entry_price) if position else None
+        unfilled = 0.0
+        for order in self.broker.get_open_orders():
+            if order.symbol == symbol:
+                remaining = float(order.qty) - float(order.filled_qty or 0)
+                unfilled += remaining if order.side == 'buy' else -remaining
+        net = held + unfilled
+        # Unfilled buys opening or adding to a long move its average entry price
+        if unfilled > 0 and held >= 0 and price is not None:
+            entry = ((entry or 0.0) * held + price * unfilled) / net
+        return net, entry if net else None
+
+    def _plan_orders(self, signal, current_price, pending_trades=0, approval=None):
+        """
+        Applies risk checks, sizing and position logic to a signal.
+        `approval` is this signal's result from a batched `RiskEngine.check_trades`, if any.
+
+        Returns:
+            list: Orders to send, in order, as (qty, side, records_trade, realized_pnl, description,
+                reservation) tuples; realized_pnl is the estimated PnL of a closing order, else None,
+                and reservation the daily trade reserved for an order that counts as a trade.
+        """
+        return self._reserve(signal['symbol'], self._decide_orders(signal, current_price, pending_trades, approval))
+
+    def _reserve(self, symbol, orders):
+        # Every order that counts as a trade takes its daily slot in the risk journal before it
+        # is sent; the checks in _decide_orders only read the count, which other processes share
+        planned = []
+        for qty, side, records_trade, realized_pnl, description in orders:
+            reservation = None
+            if records_trade:
+                reservation = self.risk_engine.reserve_trade(symbol, qty)
+                if reservation is None:
+                    logger.warning("Trade blocked by Risk Engine: Max daily trades reached")
+                    audit("risk_decision", symbol=symbol, side=side, allowed=False, reason="Max daily trades reached")
+                    continue
+            planned.append((qty, side, records_trade, realized_pnl, description, reservation))
+        return planned
+
+    def _decide_orders(self, signal, current_price, pending_trades=0, approval=None):
+        # Risk checks, sizing and position logic; see _plan_orders
         symbol = signal['symbol']
         direction = signal['signal']
         
         if direction == 'HOLD':
             logger.info("Signal is HOLD. No action taken.")
-            return
+            return []
 
         # 1. Validate with Risk Engine
-        allowed, risk_msg = self.risk_engine.check_trade(signal)
+        if approval is None:
+            with span("risk_check"):
+                approval = self.risk_engine.check_trade(signal, pending_trades)
+        allowed, risk_msg = approval
+        audit("risk_decision", symbol=symbol, signal=direction, price=current_price, allowed=allowed,
+              max_position_value=risk_msg if allowed else None, reason=None if allowed else risk_msg)
         if not allowed:
-            logger.warning(f"Trade blocked by Risk Engine: {risk_msg}")
-            return
+            logger.warning("Trade blocked by Risk Engine: %s", risk_msg)
+            return []
 
         # 2. Calculate Position Size
         # risk_msg is the max_position_value if allowed is True (from previous tool implementation logic)
@@ -45,59 +129,220 @@ class Executor:
         qty = math.floor(max_usd_position / current_price)
         
         if qty <= 0:
-            logger.warning(f"Calculated quantity is 0 (Capital: {max_usd_position}, Price: {current_price})")
-            return
+            logger.warning("Calculated quantity is 0 (Capital: %s, Price: %s)", max_usd_position, current_price)
+            return []
+
+        # 3. Decide Orders
+        # Check existing position first?
+        # If we are reversing, we mighty need to close existing.
+        # But prompt says "MVP", so maybe just open new position.
+        # Actually, SMA crossover usually implies "Long Only" or "Long/Short". 
+        # If we hold Long and get Sell signal, we should Close Long.
+        # Let's assume Long Only for MVP simplicity unless "Short" is specified.
+        # Usually: Buy = Enter Long, Sell = Exit Long (or Enter Short).
+        # The strategy returns BUY/SELL.
+        # Let's implement: 
+        #   BUY -> If no position, open Long. If Short, Close Short & Open Long (flip).
+        #   SELL -> If Long, Close Long. If no position, Open Short? or Stay Flat?
+        # Given "MVP", let's do:
+        #   BUY -> Open Long (if not already long)
+        #   SELL -> Close Long (if long)
+        
+        # Check current position (O(1) lookup in the broker's positions snapshot), counting
+        # orders already sent for the symbol: an exit queued by a stop, or a BUY not yet filled
+        net = self.net_position(symbol, current_price)
+        if net is None:
+            logger.warning("Orders for %s still unacknowledged. Skipping %s signal.", symbol, direction)
+            return []
+        current_qty, entry_price = net
+        
+        if direction == 'BUY':
+            if current_qty > 0:
+                logger.info("Already Long. Holding.")
+                return []
+            orders = []
+            if current_qty < 0:
+                # Close Short first (not implemented for MVP, assuming long-only start)
+                orders.append((abs(current_qty), 'buy', False, None, f"BUY {abs(current_qty)} shares of {symbol} to close short."))
+            # Open Long
+            orders.append((qty, 'buy', True, None, f"BUY {qty} shares of {symbol} at ~{current_price}"))
+            return orders
 
-        # 3. Submit Order
+        if direction == 'SELL':
+            if current_qty > 0:
+                # Close Long
+                realized_pnl = (current_price - entry_price) * abs(current_qty)
+                return [(abs(current_qty), 'sell', True, realized_pnl, f"SELL {abs(current_qty)} shares of {symbol} to close position.")]
+            logger.info("No position to Sell.")
+        return []
+
+    def execute_signal(self, signal, current_price):
+        """
+        Executes a trade based on the generated signal.
+        
+        Args:
+            signal (dict): The signal from Strategy Engine.
+            current_price (float): The latest price of the asset.
+        """
         try:
-            side = 'buy' if direction == 'BUY' else 'sell'
-            # Check existing position first?
-            # If we are reversing, we mighty need to close existing.
-            # But prompt says "MVP", so maybe just open new position.
-            # Actually, SMA crossover usually implies "Long Only" or "Long/Short". 
-            # If we hold Long and get Sell signal, we should Close Long.
-            # Let's assume Long Only for MVP simplicity unless "Short" is specified.
-            # Usually: Buy = Enter Long, Sell = Exit Long (or Enter Short).
-            # The strategy returns BUY/SELL.
-            # Let's implement: 
-            #   BUY -> If no position, open Long. If Short, Close Short & Open Long (flip).
-            #   SELL -> If Long, Close Long. If no position, Open Short? or Stay Flat?
-            # Given "MVP", let's do:
-            #   BUY -> Open Long (if not already long)
-            #   SELL -> Close Long (if long)
-            
-            # Check current position
-            positions = self.broker.get_positions()
-            current_qty = 0
-            for p in positions:
-                if p.symbol == symbol:
-                    current_qty = float(p.qty)
-                    break
-            
-            if direction == 'BUY':
-                if current_qty > 0:
-                    logger.info("Already Long. Holding.")
-                    return
-                elif current_qty < 0:
-                     # Close Short first (not implemented for MVP, assuming long-only start)
-                     self.broker.submit_order(symbol, abs(current_qty), 'buy') # close short
-                
-                # Open Long
-                order = self.broker.submit_order(symbol, qty, 'buy')
+            for qty, side, records_trade, realized_pnl, description, reservation in self._plan_orders(signal, current_price):
+                with span("order_submit"):
+                    order = self.broker.submit_order(signal['symbol'], qty, side)
+                ORDERS.inc(side=side, result="accepted" if order else "rejected")
+                audit("order", symbol=signal['symbol'], side=side, qty=qty, status="accepted" if order else "rejected",
+                      order_id=getattr(order, 'id', None))
                 if order:
-                    logger.info(f"Executed BUY {qty} shares of {symbol} at ~{current_price}")
-                    self.risk_engine.record_trade() # update daily stats
-            
-            elif direction == 'SELL':
-                if current_qty > 0:
-                    # Close Long
-                    order = self.broker.submit_order(symbol, abs(current_qty), 'sell')
-                    if order:
-                        logger.info(f"Executed SELL {abs(current_qty)} shares of {symbol} to close position.")
-                        self.risk_engine.record_trade()
-                else:
-                    logger.info("No position to Sell.")
+                    self._record_fill(signal['symbol'], qty, side, current_price, records_trade, realized_pnl, description, reservation)
+                elif reservation is not None:
+                    self.risk_engine.release_trade(reservation)
+
+        except Exception as e:
+            logger.error("Execution failed: %s", e)
+
+    def submit_signal(self, signal, current_price, pending_trades=0, approval=None):
+        """
+        Non-blocking: plans `signal` and queues its orders on the OrderPipeline.
+        Daily risk stats are updated as each order is accepted.
+
+        Args:
+            signal (dict): The signal from Strategy Engine.
+            current_price (float): The latest price of the asset.
+            pending_trades (int): Trades already approved but not yet recorded.
+            approval (tuple): Result of a batched risk check for this signal, if already run.
+
+        Returns:
+            list: (future, records_trade, description) for each queued order.
+        """
+        if self.pipeline is None:
+            self.pipeline = OrderPipeline(self.broker)
+
+        try:
+            planned = self._plan_orders(signal, current_price, pending_trades, approval)
+        except Exception as e:
+            logger.error("Execution failed: %s", e)
+            return []
+
+        submitted = []
+        for qty, side, records_trade, realized_pnl, description, reservation in planned:
+            future = self.pipeline.submit(signal['symbol'], qty, side)
+            future.add_done_callback(
+                lambda f, leg=(signal['symbol'], qty, side, current_price, records_trade, realized_pnl, description, reservation): self._on_order_done(f, *leg)
+            )
+            self._track(signal['symbol'], future)
+            submitted.append((future, records_trade, description))
+        return submitted
+
+    def _on_order_done(self, future, symbol, qty, side, price, records_trade, realized_pnl, description, reservation=None):
+        if future.cancelled() or future.exception() is not None:
+            if reservation is not None:
+                self.risk_engine.release_trade(reservation)
+            return
+        self._record_fill(symbol, qty, side, price, records_trade, realized_pnl, description, reservation)
+
+    def _record_fill(self, symbol, qty, side, price, records_trade, realized_pnl, description, reservation=None):
+        # update daily stats (a reserved trade is already in the journal)
+        if records_trade:
+            logger.info("Executed %s", description)
+            if reservation is None:
+                self.risk_engine.record_trade(symbol, qty)
+        if realized_pnl is not None:
+            self.risk_engine.record_pnl(realized_pnl, symbol)
+
+        # Opening a long sets its stop; closing a position (realized PnL) drops it
+        if self.stop_monitor is not None and records_trade:
+            if realized_pnl is not None:
+                self.stop_monitor.remove(symbol)
+            elif side == 'buy':
+                self.stop_monitor.protect(symbol, qty, price)
+
+    def check_stops(self, prices, wait_for_exits=False):
+        """
+        Feeds price ticks (symbol -> price) to the stop monitor and submits the exits of every
+        breached stop as one batch.
 
+        Returns:
+            list: (future, records_trade, description) for each queued exit order.
+        """
+        if self.stop_monitor is None:
+            return []
+        breached = self.stop_monitor.check_prices(prices)
+        if not breached:
+            return []
+        submitted = self.submit_exits(breached)
+        if wait_for_exits:
+            wait([future for future, _, _ in submitted])
+        return submitted
+
+    def submit_exits(self, stops):
+        """
+        Queues a market order closing each breached stop on the OrderPipeline, all at once.
+        Exits bypass the risk checks; they are sized down to the position actually held, net
+        of orders already in flight, so a stale stop (or a second exit) can never open a
+        position the other way.
+
+        Returns:
+            list: (future, records_trade, description) for each queued exit order.
+        """
+        if self.pipeline is None:
+            self.pipeline = OrderPipeline(self.broker)
+
+        submitted = []
+        for stop in stops:
+            symbol, price = stop['symbol'], stop['trigger_price']
+            net = self.net_position(symbol, price)
+            if net is None:
+                logger.error("Orders for %s still unacknowledged; stop exit not sent.", symbol)
+                continue
+            held, held_entry = net
+            if stop['side'] == 'long':
+                qty, side = min(stop['qty'], max(held, 0.0)), 'sell'
+            else:
+                qty, side = min(stop['qty'], max(-held, 0.0)), 'buy'
+            if qty <= 0:
+                logger.info("Stop on %s triggered with no position left to exit.", symbol)
+                continue
+
+            entry_price = stop['entry_price'] if stop['entry_price'] is not None else held_entry
+            realized_pnl = (price - entry_price) * qty if side == 'sell' else (entry_price - price) * qty
+            description = f"{side.upper()} {qty} shares of {symbol} on stop @ ${stop['stop_price']:.2f} (last ${price:.2f})"
+            logger.warning("Stop triggered: %s", description)
+            audit("stop_triggered", symbol=symbol, side=stop['side'], qty=qty, stop_price=stop['stop_price'],
+                  price=price, realized_pnl=realized_pnl)
+
+            future = self.pipeline.submit(symbol, qty, side)
+            future.add_done_callback(
+                lambda f, leg=(symbol, qty, side, price, True, realized_pnl, description): self._on_order_done(f, *leg)
+            )
+            self._track(symbol, future)
+            submitted.append((future, True, description))
+        return submitted
+
+    def execute_signals(self, signals, market_data=None):
+        """
+        Executes a batch of signals with their orders submitted concurrently through the
+        OrderPipeline (rate limited, with retries), then waits for all of them.
+
+        All signals go through one portfolio-level risk pass (`RiskEngine.check_trades`), so
+        exposure and daily trade limits account for every signal in the batch.
+
+        Args:
+            signals (list): (signal, current_price) tuples.
+            market_data (dict): Optional symbol -> OHLCV DataFrame, for correlation limits.
+
+        Returns:
+            list: Broker orders that were accepted.
+        """
+        try:
+            with span("risk_check"):
+                approvals = self.risk_engine.check_trades(signals, market_data)
         except Exception as e:
-            logger.error(f"Execution failed: {e}")
+            logger.error("Risk check failed: %s", e)
+            return []
+
+        # A short cover and the new long are both buys, so all legs can run concurrently.
+        pending = []
+        for (signal, current_price), approval in zip(signals, approvals):
+            pending.extend(self.submit_signal(signal, current_price, approval=approval))
 
+        wait([future for future, _, _ in pending])
+        return [future.result() for future, _, _ in pending if future.exception() is None]
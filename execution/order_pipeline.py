@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from config.settings import Config
+from monitoring.metrics import span, ORDERS
+from monitoring.logging_setup import audit
+
+logger = logging.getLogger("TradingBot")
+
+# Statuses alpaca_trade_api's REST client retries itself (its APCA_RETRY_CODES default)
+SDK_RETRIED_STATUSES = (429, 504)
+
+def is_transient(error):
+    """
+    True for failures worth retrying: network errors and broker-side 5xx. Rejections such as
+    insufficient buying power are final. 429 and 504 are not retried here: the SDK has already
+    retried them (APCA_RETRY_MAX times) by the time they surface.
+    """
+    import requests
+    from alpaca_trade_api.rest import APIError
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, APIError):
+        status = error.status_code
+        return status is not None and status >= 500 and status not in SDK_RETRIED_STATUSES
+    return False
+
+class TokenBucket:
+    """
+    Asyncio token bucket: `rate` tokens per second, bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class OrderPipeline:
+    """
+    Concurrent order submission on a dedicated asyncio event loop.
+
+    Orders are throttled by a token bucket matched to the broker's request quota, and blocking
+    REST calls run on a small thread pool so many can be in flight at once. Transient failures
+    are retried up to Config.MAX_RETRIES times with jittered exponential backoff based on
+    Config.RETRY_DELAY. Every attempt carries the same client_order_id, so a retry of an order
+    that did reach the broker cannot place it twice.
+
+    `submit` is thread-safe and returns a concurrent.futures.Future resolving to the broker
+    order (or raising the final error); `submit_async` is the coroutine for code already running
+    on an event loop.
+    """
+
+    def __init__(self, broker, rate_per_min=Config.ORDER_RATE_LIMIT_PER_MIN, burst=Config.ORDER_RATE_BURST,
+                 max_retries=Config.MAX_RETRIES, retry_delay=Config.RETRY_DELAY, max_concurrency=Config.MAX_WORKERS):
+        self.broker = broker
+        self.rate_per_min = rate_per_min
+        self.burst = burst
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._thread = None
+        self._bucket = None
+        self._pool = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="OrderPipeline")
+                self._thread = threading.Thread(target=self._loop.run_forever, name="OrderPipelineLoop", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def submit(self, symbol, qty, side, type='market', time_in_force='day'):
+        """
+        Queues an order and returns a concurrent.futures.Future for it.
+        Await it from asyncio code with `asyncio.wrap_future(future)`.
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(
+            self.submit_async(symbol, qty, side, type=type, time_in_force=time_in_force), loop
+        )
+
+    async def submit_async(self, symbol, qty, side, type='market', time_in_force='day'):
+        loop = asyncio.get_running_loop()
+        if self._bucket is None:
+            self._bucket = TokenBucket(self.rate_per_min / 60.0, self.burst)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="OrderPipeline")
+
+        # One id per logical order, resent unchanged on every retry
+        client_order_id = uuid.uuid4().hex
+        place = partial(self.broker.place_order, symbol, qty, side, type=type, time_in_force=time_in_force,
+                        client_order_id=client_order_id)
+        # Timed from queueing to the final answer, including throttling and retries
+        with span("order_submit"):
+            for attempt in range(self.max_retries + 1):
+                await self._bucket.acquire()
+                try:
+                    order = await loop.run_in_executor(self._pool, place)
+                    ORDERS.inc(side=side, result="accepted")
+                    audit("order", symbol=symbol, side=side, qty=qty, type=type, status="accepted",
+                          order_id=getattr(order, 'id', None), client_order_id=client_order_id, attempts=attempt + 1)
+                    return order
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_transient(e):
+                        logger.error("Error submitting order %s %s %s: %s", side, qty, symbol, e)
+                        ORDERS.inc(side=side, result="rejected")
+                        audit("order", symbol=symbol, side=side, qty=qty, type=type, status="rejected",
+                              error=str(e), client_order_id=client_order_id, attempts=attempt + 1)
+                        raise
+                    delay = random.uniform(0, self.retry_delay * 2 ** attempt)
+                    logger.warning("Transient error submitting %s %s %s (%s). Retry %s/%s in %.2fs", side, qty, symbol, e, attempt + 1, self.max_retries, delay)
+                    ORDERS.inc(side=side, result="retried")
+                    await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _drain():
+        # Runs every order still queued or retrying to its answer; orders resolved meanwhile
+        # run their callbacks on the loop, which may queue more, so repeat until none are left
+        current = asyncio.current_task()
+        while True:
+            pending = [task for task in asyncio.all_tasks() if task is not current]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def close(self):
+        """
+        Waits for every queued order to be answered (and its callbacks to run), then stops
+        the loop and its thread pool.
+        """
+        with self._start_lock:
+            if self._loop is not None:
+                asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+                self._loop = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            self._bucket = None
@@ -1,94 +1,261 @@
 import logging
 import time
-import schedule
 import argparse
-from colorama import init, Fore, Style
+from colorama import init, Fore
 from config.settings import Config
-from broker.alpaca_adapter import AlpacaAdapter
-from data.market_data import MarketData
-from strategy.moving_average import MovingAverageCrossover
-from risk.risk_engine import RiskEngine
-from execution.executor import Executor
+from monitoring.metrics import REGISTRY, MetricsServer, span, CYCLES, SIGNALS
+from monitoring.logging_setup import setup_logging, audit, CYAN, GREEN, YELLOW
+
+# Heavy modules (pandas, numpy, the Alpaca SDK, yfinance, asyncio) are imported inside the
+# functions that use them, so `--help` and one-shot runs only load what their path needs.
 
 # Initialize colorama
 init(autoreset=True)
 
-# Setup Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(Config.LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+# Setup Logging: records are queued and written (console, log file, JSONL audit stream) by a
+# background listener thread, so the trading thread never blocks on I/O
+setup_logging()
 logger = logging.getLogger("TradingBot")
 
-def run_trading_cycle():
-    logger.info(f"{Fore.CYAN}Starting Trading Cycle for {Config.SYMBOL}...")
-    
+def evaluate_signals(strategies, market_data):
+    """
+    Evaluates one strategy, or a list of registered strategies, for every symbol in one
+    vectorized pass over a shared indicator engine.
+    Returns a list of (signal, current_price) tuples for the symbols that produced a signal.
+    """
+    from strategy.registry import evaluate_strategies
+
+    if not isinstance(strategies, (list, tuple)):
+        strategies = [strategies]
+    return evaluate_strategies(strategies, market_data)
+
+def make_service(simulate=False):
+    from service.trading_service import TradingService
+    return TradingService.simulated() if simulate else TradingService()
+
+def make_data_feed(simulate=False):
+    from data.market_data import MarketData
+    if simulate:
+        from broker.simulated_broker import SimulatedBroker
+        # Synthetic data is local: never hedge it with a network provider
+        return MarketData(use_alpaca=True, adapter=SimulatedBroker(), use_cache=False, use_fallback=False)
+    return MarketData(use_alpaca=True)
+
+def run_trading_cycle(symbols=None, service=None, simulate=False):
+    """
+    Runs one trading cycle. A long-lived TradingService can be passed in so its components
+    and broker session are reused; otherwise one is built for this cycle only.
+    """
+    symbols = symbols or Config.SYMBOLS
+    if service is None:
+        service = make_service(simulate)
+        try:
+            return run_trading_cycle(symbols, service)
+        finally:
+            service.close()
+
+    logger.info("Starting Trading Cycle for %s symbol(s)...", len(symbols), extra=CYAN)
+    with span("cycle"):
+        result = _trading_cycle(symbols, service)
+    CYCLES.inc(result=result)
+    export_metrics()
+
+def _trading_cycle(symbols, service):
+    """
+    Body of run_trading_cycle, with every stage timed. Returns the cycle outcome.
+    """
     # 1. Initialize Components
-    broker = AlpacaAdapter()
-    if not broker.api:
-        logger.error(f"{Fore.RED}Broker connection failed. Aborting cycle.")
-        return
+    with span("prepare"):
+        connected = service.prepare_cycle()
+    if not connected:
+        logger.error("Broker connection failed. Aborting cycle.")
+        return "aborted"
 
-    data_feed = MarketData(use_alpaca=True)
-    strategy = MovingAverageCrossover(Config.SMA_SHORT, Config.SMA_LONG)
-    risk_engine = RiskEngine(broker)
-    executor = Executor(broker, risk_engine)
+    data_feed = service.data_feed
+    strategies = service.strategies
+    executor = service.executor
 
     # 2. Fetch Data
-    logger.info(f"Fetching market data for {Config.SYMBOL}...")
-    df = data_feed.get_market_data(Config.SYMBOL, timeframe=Config.TIMEFRAME)
-    if df.empty:
-        logger.error(f"{Fore.RED}No market data available.")
-        return
-    
-    current_price = df['Close'].iloc[-1]
-    logger.info(f"Current Price of {Config.SYMBOL}: ${current_price:.2f}")
+    logger.info("Fetching market data for %s symbol(s)...", len(symbols))
+    with span("fetch_data"):
+        market_data = data_feed.get_market_data_batch(symbols, timeframe=Config.TIMEFRAME)
+    if not market_data:
+        logger.error("No market data available.")
+        return "no_data"
+    logger.info("Market data received for %s/%s symbol(s).", len(market_data), len(symbols))
 
-    # 3. Generate Signal
+    # Exit positions whose stop-loss was breached at the latest close before acting on new signals
+    with span("stops"):
+        executor.check_stops({symbol: df['Close'].iloc[-1] for symbol, df in market_data.items()}, wait_for_exits=True)
+
+    # 3. Generate Signals
     logger.info("Analyzing market data...")
-    signal = strategy.generate_signal(df)
-    
-    if not signal:
+    with span("signals"):
+        signals = evaluate_signals(strategies, market_data)
+
+    if not signals:
         logger.warning("No signal generated (insufficient data?)")
+        return "no_signals"
+
+    for signal, _ in signals:
+        SIGNALS.inc(signal=signal['signal'])
+    actionable = [(signal, price) for signal, price in signals if signal['signal'] != 'HOLD']
+    logger.info("Signals: %s actionable, %s HOLD", len(actionable), len(signals) - len(actionable), extra=YELLOW)
+
+    # 4. Execute Signals
+    # Risk checks run in order; the resulting orders are submitted concurrently.
+    for signal, current_price in actionable:
+        logger.info("Signal: %s %s @ $%.2f (Confidence: %s)", signal['signal'], signal['symbol'], current_price, signal['confidence'], extra=YELLOW)
+        audit("signal", price=current_price, **signal)
+    if actionable:
+        with span("execution"):
+            executor.execute_signals(actionable, market_data)
+
+    if not actionable:
+        logger.info("Holding positions. No trade execution required.")
+
+    logger.info("Trading Cycle Completed.\n", extra=GREEN)
+    return "completed"
+
+def export_metrics():
+    # Writes the Prometheus textfile if METRICS_FILE is set; the /metrics endpoint needs nothing
+    if not Config.METRICS_FILE:
         return
+    try:
+        REGISTRY.write_file(Config.METRICS_FILE)
+    except OSError as e:
+        logger.error("Error writing metrics file: %s", e)
 
-    logger.info(f"{Fore.YELLOW}Signal: {signal['signal']} (Confidence: {signal['confidence']})")
+def run_backtest(symbols=None, bars=Config.BACKTEST_BARS, simulate=False):
+    symbols = symbols or Config.SYMBOLS
+    logger.info("Starting Backtest for %s symbol(s) over %s bars...", len(symbols), bars, extra=CYAN)
 
-    # 4. Execute Signal
-    if signal['signal'] != 'HOLD':
-        executor.execute_signal(signal, current_price)
-    else:
-        logger.info("Holding position. No trade execution required.")
+    data_feed = make_data_feed(simulate)
+    market_data = data_feed.get_market_data_batch(symbols, timeframe=Config.TIMEFRAME, limit=bars)
+    if not market_data:
+        logger.error("No market data available.")
+        return None
+
+    from strategy.moving_average import MovingAverageCrossover
+    from backtest.engine import Backtester
+    strategy = MovingAverageCrossover(Config.SMA_SHORT, Config.SMA_LONG)
+    result = Backtester(strategy).run(market_data)
+
+    stats = result["stats"]
+    logger.info("Backtest Completed: %s symbol(s), %s bars", len(market_data), len(result['equity_curve']), extra=GREEN)
+    logger.info("Final Equity: $%s | Return: %.2f%% | CAGR: %.2f%%", format(stats['final_equity'], ',.2f'), stats['total_return'] * 100, stats['cagr'] * 100)
+    logger.info("Sharpe: %.2f | Max Drawdown: %.2f%% | Max Leverage: %.2fx", stats['sharpe'], stats['max_drawdown'] * 100, stats['max_leverage'])
+    logger.info("Trades: %s | Round Trips: %s | Win Rate: %.2f%% | Blocked: %s", stats['trades'], stats['round_trips'], stats['win_rate'] * 100, stats['blocked'])
+    return result
+
+def run_optimizer(symbols=None, bars=Config.BACKTEST_BARS, simulate=False):
+    symbols = symbols or Config.SYMBOLS
+    logger.info("Starting SMA Parameter Sweep for %s symbol(s) over %s bars...", len(symbols), bars, extra=CYAN)
+
+    data_feed = make_data_feed(simulate)
+    market_data = data_feed.get_market_data_batch(symbols, timeframe=Config.TIMEFRAME, limit=bars)
+    if not market_data:
+        logger.error("No market data available.")
+        return None
+
+    from backtest.optimizer import ParameterSweep
+    results = ParameterSweep().run(market_data)
+    logger.info("Parameter Sweep Completed. Top window pairs:\n%s", results.head(10).to_string(index=False), extra=GREEN)
+    return results
 
-    logger.info(f"{Fore.GREEN}Trading Cycle Completed.\n")
+def run_streaming(symbols=None, replay_file=None, replay_speed=0, simulate=False):
+    """
+    Event-driven mode: bars are pushed from Alpaca's websocket (or a local replay of a
+    recorded CSV) straight into the strategy and executor as they arrive.
+    A replay with `simulate=False` sends real orders, sized from the recorded prices.
+    """
+    import asyncio
+    from service.streaming_service import StreamingService
+    from data.stream import AlpacaBarStream, ReplayServer, ReplayBarStream
+    from data.bar_store import BarStore
+
+    symbols = symbols or Config.SYMBOLS
+    service = make_service(simulate)
+    # Warm-up history and streamed bars go to one compact store (see data/bar_store.py)
+    bar_store = BarStore(len(symbols)) if Config.USE_BAR_STORE else None
+    try:
+        if not service.prepare_cycle():
+            logger.error("Broker connection failed. Aborting stream.")
+            return
+
+        if replay_file is None:
+            streaming = StreamingService(service.strategy, service.executor, AlpacaBarStream(), service.data_feed,
+                                         bar_store=bar_store)
+            streaming.run(symbols)
+            return
+
+        if not simulate:
+            logger.warning("Replaying %s against the live broker: orders go to the configured account.", replay_file)
+
+        async def replay():
+            server = ReplayServer.from_csv(replay_file, port=0, speed=replay_speed)
+            await server.start()
+            try:
+                stream = ReplayBarStream(port=server.port)
+                await StreamingService(service.strategy, service.executor, stream, bar_store=bar_store).run_async(symbols)
+            finally:
+                await server.stop()
+
+        asyncio.run(replay())
+    finally:
+        service.close()
+        export_metrics()
 
 def main():
     parser = argparse.ArgumentParser(description='Algorithmic Trading Bot MVP')
     parser.add_argument('--loop', action='store_true', help='Run in a continuous loop')
+    parser.add_argument('--symbols', type=str, help='Comma-separated watchlist (overrides TRADING_SYMBOLS)')
+    parser.add_argument('--backtest', action='store_true', help='Backtest the strategy on historical data and exit')
+    parser.add_argument('--optimize', action='store_true', help='Sweep SMA_SHORT/SMA_LONG window pairs on historical data and exit')
+    parser.add_argument('--stream', action='store_true', help='Event-driven mode: trade on each streamed bar as it arrives')
+    parser.add_argument('--replay', type=str, metavar='CSV', help='With --stream, replay recorded bars from a CSV through a local server')
+    parser.add_argument('--replay-speed', type=float, default=0, help='Bars per second for --replay (0 = as fast as possible)')
+    parser.add_argument('--bars', type=int, default=Config.BACKTEST_BARS, help='Number of historical bars for --backtest/--optimize')
+    parser.add_argument('--metrics-port', type=int, default=Config.METRICS_PORT, help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics (0 = off)')
+    parser.add_argument('--simulate', action='store_true', help='Trade against an in-process simulated broker with synthetic data (no API keys needed)')
+    parser.add_argument('--live', action='store_true', help='With --replay, trade the replayed bars on the configured Alpaca account instead of the simulated broker')
     args = parser.parse_args()
 
+    if args.symbols:
+        Config.SYMBOLS = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    if args.metrics_port:
+        MetricsServer(port=args.metrics_port).start()
+
     print(f"{Fore.MAGENTA}==========================================")
     print(f"{Fore.MAGENTA}   INSTITUTIONAL TRADING BOT - CORE v1.0  ")
     print(f"{Fore.MAGENTA}==========================================\n")
 
-    if args.loop:
+    if args.backtest:
+        run_backtest(bars=args.bars, simulate=args.simulate)
+    elif args.optimize:
+        run_optimizer(bars=args.bars, simulate=args.simulate)
+    elif args.stream or args.replay:
+        # Replays are offline tests: they never reach a real account unless asked to
+        simulate = args.simulate or (args.replay is not None and not args.live)
+        run_streaming(replay_file=args.replay, replay_speed=args.replay_speed, simulate=simulate)
+    elif args.loop:
+        import schedule
         logger.info("Starting in continuous loop mode (Daily Check).")
+        # Components and the broker session are built once and reused by every cycle
+        service = make_service(args.simulate)
+
         # Schedule the job every day at market open or specific time?
         # For MVP loop, we'll run immediately then wait.
-        run_trading_cycle() # Run once on start
+        run_trading_cycle(service=service) # Run once on start
         
         # Schedule next run
-        schedule.every().day.at("09:30").do(run_trading_cycle) 
+        schedule.every().day.at("09:30").do(run_trading_cycle, service=service)
         
         while True:
             schedule.run_pending()
             time.sleep(60)
     else:
-        run_trading_cycle()
+        run_trading_cycle(simulate=args.simulate)
 
 if __name__ == "__main__":
     main()
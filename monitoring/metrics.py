@@ -0,0 +1,274 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from config.settings import Config
+
+logger = logging.getLogger("TradingBot")
+
+# Seconds; covers sub-millisecond cache hits up to slow multi-symbol downloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    """
+    Base for a metric family: one named metric with a child per combination of label values.
+    Children are created on first use and kept for the life of the process.
+    """
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(map(labels.__getitem__, self.label_names))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.label_names, values)} {child.value}"]
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+class _Timer:
+    # A plain class rather than @contextmanager, which costs several times more per block
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            with _Timer(self.child):
+                return fn(*args, **kwargs)
+        return timed
+
+class Histogram(_Metric):
+    """
+    Latency histogram with fixed buckets. Observing is a bisect plus one lock, a few
+    microseconds, so spans can stay enabled on every hot path.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        """
+        Context manager (or decorator) that observes the wall time of its block.
+        """
+        return _Timer(self.labels(**labels))
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+        le = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.label_names, values)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.label_names, values)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Holds metric families by name. Asking for an existing name returns the same family, so
+    modules can declare the metrics they record at import time.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets)
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """
+        Writes the metrics to `path` atomically, e.g. for node_exporter's textfile collector.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram("trading_stage_seconds", "Wall time of trading cycle stages.", labels=("stage",))
+BROKER_LATENCY = REGISTRY.histogram("broker_request_seconds", "Latency of broker API requests.", labels=("method",))
+BROKER_ERRORS = REGISTRY.counter("broker_request_errors_total", "Broker API requests that raised.", labels=("method",))
+SNAPSHOT_READS = REGISTRY.counter("broker_snapshot_reads_total", "Account/positions/orders reads by cache result.", labels=("snapshot", "result"))
+CYCLES = REGISTRY.counter("trading_cycles_total", "Trading cycles run, by outcome.", labels=("result",))
+SIGNALS = REGISTRY.counter("trading_signals_total", "Strategy signals generated.", labels=("signal",))
+ORDERS = REGISTRY.counter("orders_total", "Orders sent to the broker, by side and result.", labels=("side", "result"))
+DATA_REQUESTS = REGISTRY.counter("data_provider_requests_total", "Market data provider requests, by result.", labels=("provider", "result"))
+DATA_LATENCY = REGISTRY.histogram("data_provider_seconds", "Latency of market data provider requests.", labels=("provider",))
+BREAKER_TRIPS = REGISTRY.counter("data_provider_breaker_trips_total", "Times a provider's circuit breaker opened.", labels=("provider",))
+
+def span(stage):
+    """
+    Times a trading cycle stage into trading_stage_seconds{stage=...}:
+
+        with span("fetch_data"):
+            ...
+    """
+    return STAGE_LATENCY.time(stage=stage)
+
+class MetricsServer:
+    """
+    Serves GET /metrics in Prometheus text format from a daemon thread.
+    """
+
+    def __init__(self, registry=REGISTRY, host=Config.METRICS_HOST, port=Config.METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        # http.server is only imported when the endpoint is enabled
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
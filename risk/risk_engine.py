@@ -1,57 +1,129 @@
 import json
 import logging
+import numpy as np
 from datetime import datetime, date
 from config.settings import Config
+from risk.state_store import RiskStateStore
 import os
 
 logger = logging.getLogger("TradingBot")
 
+_DIRECTIONS = {"BUY": 1, "SELL": -1}
+
+def water_fill(requested, capacity):
+    """
+    Approves `requested` amounts in order until `capacity` (a scalar, or one value per request)
+    is used up; the request that crosses it is cut down to what is left. This is the greedy
+    one-at-a-time check done with a single cumulative sum.
+    """
+    before = np.cumsum(requested) - requested
+    return np.clip(capacity - before, 0.0, requested)
+
+def group_water_fill(requested, groups, capacity):
+    """
+    `water_fill` run independently within each group (integer codes); `capacity` holds the
+    remaining capacity of each request's group.
+    """
+    order = np.argsort(groups, kind='stable')
+    ordered = requested[order]
+    totals = np.cumsum(ordered)
+    codes = groups[order]
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+    # Running total at the start of each request's group (totals never decrease)
+    group_start = np.maximum.accumulate(np.where(starts, totals - ordered, 0.0))
+    before = np.empty_like(ordered)
+    before[order] = totals - ordered - group_start
+    return np.clip(capacity - before, 0.0, requested)
+
+def load_sector_map(path):
+    """
+    Reads a JSON object mapping symbol -> sector. Returns {} if `path` is unset or unreadable.
+    """
+    if not path:
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return {symbol.upper(): sector for symbol, sector in json.load(f).items()}
+    except Exception as e:
+        logger.error("Error loading sector map: %s", e)
+        return {}
+
 class RiskEngine:
     """
     Manages risk per trade and per day.
-    Tracks state of daily trades and PnL in a JSON file (simple persistence for MVP).
+    Daily trades and PnL are journaled in a RiskStateStore (SQLite, WAL mode), which is
+    crash-safe and shared by every process trading the same account.
     """
 
-    STATE_FILE = "risk_state.json"
+    # Pre-journal state file, imported once if it holds today's state
+    LEGACY_STATE_FILE = "risk_state.json"
 
-    def __init__(self, account_api_adapter):
+    def __init__(self, account_api_adapter, store=None):
         self.adapter = account_api_adapter
+        self.store = store or RiskStateStore()
+        self.sectors = load_sector_map(Config.SECTOR_MAP_FILE)
         self.state = self.load_state()
 
     def load_state(self):
-        # Loads daily stats from JSON. If file missing or old date, reset.
+        # Rebuilds today's stats from the journal. If the day has not started yet, open it.
         today_str = date.today().isoformat()
-        if os.path.exists(self.STATE_FILE):
-            try:
-                with open(self.STATE_FILE, 'r') as f:
-                    data = json.load(f)
-                    if data.get('date') == today_str:
-                        return data
-            except Exception as e:
-                logger.error(f"Error loading risk state: {e}")
-        
-        # New day or first run
-        return {
-            "date": today_str,
-            "trades_count": 0,
-            "daily_loss": 0.0,
-            "starting_balance": self.get_balance()
-        }
-
-    def save_state(self):
         try:
-            with open(self.STATE_FILE, 'w') as f:
-                json.dump(self.state, f)
+            data = self.store.load_day(today_str)
+            if data:
+                return data
+
+            # New day or first run
+            legacy = self._load_legacy_state(today_str)
+            balance = legacy['starting_balance'] if legacy else self.get_balance()
+            if balance <= 0:
+                # Broker unreachable: don't pin a zero starting balance for the whole day
+                raise ValueError("No account balance available to start the day")
+            starting_balance = self.store.start_day(today_str, balance)
+            if legacy and self.store.trades_count(today_str) == 0:
+                for _ in range(legacy.get('trades_count', 0)):
+                    self.store.record_trade(today_str)
+            return self.store.load_day(today_str) or {
+                "date": today_str,
+                "trades_count": 0,
+                "daily_loss": 0.0,
+                "starting_balance": starting_balance
+            }
+        except Exception as e:
+            logger.error("Error loading risk state: %s", e)
+            return {
+                "date": today_str,
+                "trades_count": 0,
+                "daily_loss": 0.0,
+                "starting_balance": self.get_balance()
+            }
+
+    def _load_legacy_state(self, today_str):
+        if not os.path.exists(self.LEGACY_STATE_FILE):
+            return None
+        try:
+            with open(self.LEGACY_STATE_FILE, 'r') as f:
+                data = json.load(f)
+            return data if data.get('date') == today_str else None
         except Exception as e:
-            logger.error(f"Error saving risk state: {e}")
+            logger.error("Error loading legacy risk state: %s", e)
+            return None
+
+    def roll_day(self):
+        """
+        Starts a fresh daily state if the date changed since the state was loaded.
+        Used by long-lived processes that keep one RiskEngine across days.
+        """
+        if self.state.get('date') != date.today().isoformat():
+            self.state = self.load_state()
 
     def get_balance(self):
         acct = self.adapter.get_account()
         return float(acct.equity) if acct else 0.0
 
-    def check_trade(self, signal):
+    def check_trade(self, signal, pending_trades=0):
         """
         Validates if a trade can be executed based on risk rules.
+        `pending_trades` counts trades already approved in the same batch but not yet recorded.
         """
         if signal['signal'] == 'HOLD':
             return False, "Signal is HOLD"
@@ -59,7 +131,12 @@ class RiskEngine:
         current_balance = self.get_balance()
         
         # 1. Check daily trade limit
-        if self.state['trades_count'] >= Config.MAX_TRADES_PER_DAY:
+        # Other processes may have traded since our last look; the journal count is authoritative.
+        try:
+            self.state['trades_count'] = self.store.trades_count(self.state['date'])
+        except Exception as e:
+            logger.error("Error reading risk journal: %s", e)
+        if self.state['trades_count'] + pending_trades >= Config.MAX_TRADES_PER_DAY:
             return False, "Max daily trades reached"
 
         # 2. Check daily loss limit
@@ -84,10 +161,207 @@ class RiskEngine:
         
         return True, max_position_value
 
-    def record_trade(self):
+    def check_trades(self, signals, market_data=None):
         """
-        Call this after a trade is successfully executed.
+        Portfolio-level risk pass over all of a cycle's candidate signals at once.
+
+        Reads the balance, the journal and the positions once, then sizes every new long as
+        NumPy arrays, in signal order:
+          1. Position size: Config.MAX_CAPITAL_PER_TRADE_PCT of equity.
+          2. Sector exposure (symbols in the sector map) up to Config.MAX_SECTOR_EXPOSURE_PCT.
+          3. Correlated exposure: held positions plus earlier candidates whose returns correlate
+             above Config.CORRELATION_THRESHOLD stay under Config.MAX_CORRELATED_EXPOSURE_PCT.
+             Needs `market_data`; the correlation matrix only covers candidates and holdings.
+          4. Gross and net exposure up to Config.MAX_GROSS_EXPOSURE_PCT / MAX_NET_EXPOSURE_PCT.
+        Each limit trims the request that crosses it and blocks later ones once used up. The daily loss
+        and trade limits then apply as in `check_trade`; only signals that would open or close a
+        position use up daily trades.
+
+        Args:
+            signals (list): (signal, current_price) tuples.
+            market_data (dict): Optional symbol -> OHLCV DataFrame, for correlations.
+
+        Returns:
+            list: (allowed, max_position_value or reason) per signal, as from `check_trade`.
+        """
+        n = len(signals)
+        if n == 0:
+            return []
+        direction = np.array([_DIRECTIONS.get(signal['signal'], 0) for signal, _ in signals])
+        if not direction.any():
+            return [(False, "Signal is HOLD")] * n
+
+        current_balance = self.get_balance()
+        try:
+            self.state['trades_count'] = self.store.trades_count(self.state['date'])
+        except Exception as e:
+            logger.error("Error reading risk journal: %s", e)
+
+        pnl = current_balance - self.state['starting_balance']
+        daily_loss_pct = -pnl / self.state['starting_balance'] if self.state['starting_balance'] > 0 else 0
+        if daily_loss_pct > Config.DAILY_STOP_LOSS_PCT:
+            reason = f"Daily loss limit excessive ({daily_loss_pct:.2%})"
+            return [(False, reason if d else "Signal is HOLD") for d in direction]
+
+        positions = {p.symbol: float(p.market_value) for p in self.adapter.get_positions() or []}
+        symbols = [signal['symbol'] for signal, _ in signals]
+        prices = np.array([price for _, price in signals], dtype=np.float64)
+        held = np.array([positions.get(symbol, 0.0) for symbol in symbols])
+
+        max_position_value = current_balance * Config.MAX_CAPITAL_PER_TRADE_PCT
+        # Only the first BUY/SELL per symbol may trade: later ones (e.g. from another strategy)
+        # would see the same position and send a second order. HOLDs claim no symbol.
+        actionable = np.flatnonzero(direction != 0)
+        first = np.zeros(n, dtype=bool)
+        first[actionable[np.unique(np.array(symbols, dtype=object)[actionable], return_index=True)[1]]] = True
+        opens = (direction == 1) & (held <= 0) & first
+        closes = (direction == -1) & (held > 0) & first
+        sizes = np.where(opens, max_position_value, 0.0)
+        reasons = np.full(n, None, dtype=object)
+
+        def apply(new_sizes, reason):
+            # Record why a new long could no longer buy a single share
+            blocked = opens & (new_sizes < prices) & (reasons == None)
+            reasons[blocked] = reason
+            return new_sizes
+
+        sizes = apply(sizes, "Position size below one share")
+        sizes = apply(self._sector_limit(symbols, sizes, positions, current_balance), "Sector exposure limit reached")
+        if market_data:
+            sizes = apply(self._correlation_limit(symbols, sizes, opens, positions, market_data, current_balance),
+                          "Correlated exposure limit reached")
+
+        gross = sum(abs(value) for value in positions.values())
+        net = sum(positions.values())
+        sizes = apply(water_fill(sizes, Config.MAX_GROSS_EXPOSURE_PCT * current_balance - gross), "Gross exposure limit reached")
+        sizes = apply(water_fill(sizes, Config.MAX_NET_EXPOSURE_PCT * current_balance - net), "Net exposure limit reached")
+
+        # Daily trade limit, in signal order, over the signals that will actually trade
+        trades = (opens & (reasons == None)) | closes
+        remaining = Config.MAX_TRADES_PER_DAY - self.state['trades_count']
+        over_limit = trades & (np.cumsum(trades) > remaining)
+
+        results = []
+        for i in range(n):
+            if direction[i] == 0:
+                results.append((False, "Signal is HOLD"))
+            elif not first[i]:
+                results.append((False, "Symbol already traded in this batch"))
+            elif over_limit[i]:
+                results.append((False, "Max daily trades reached"))
+            elif reasons[i] is not None:
+                results.append((False, reasons[i]))
+            else:
+                # Sells and no-op signals keep the per-trade cap, like check_trade
+                results.append((True, float(sizes[i]) if opens[i] else max_position_value))
+        return results
+
+    def _sector_limit(self, symbols, sizes, positions, balance):
+        if not self.sectors:
+            return sizes
+        exposure = {}
+        for symbol, value in positions.items():
+            sector = self.sectors.get(symbol)
+            if sector is not None:
+                exposure[sector] = exposure.get(sector, 0.0) + abs(value)
+        sectors = [self.sectors.get(symbol) for symbol in symbols]
+        codes = {sector: i for i, sector in enumerate(dict.fromkeys(sectors))}
+        groups = np.array([codes[sector] for sector in sectors])
+        capacity = np.array([np.inf if sector is None else Config.MAX_SECTOR_EXPOSURE_PCT * balance - exposure.get(sector, 0.0)
+                             for sector in sectors])
+        return group_water_fill(sizes, groups, capacity)
+
+    def _correlation_limit(self, symbols, sizes, opens, positions, market_data, balance):
+        candidates = np.flatnonzero(opens & (sizes > 0))
+        if len(candidates) == 0:
+            return sizes
+        held_symbols = [symbol for symbol, value in positions.items() if value]
+        universe = list(dict.fromkeys([symbols[i] for i in candidates] + held_symbols))
+        column = {symbol: i for i, symbol in enumerate(universe)}
+        corr = self.correlation_matrix(universe, market_data)
+        correlated = corr[[column[symbols[i]] for i in candidates]] >= Config.CORRELATION_THRESHOLD
+
+        held_values = np.zeros(len(universe))
+        for symbol in held_symbols:
+            held_values[column[symbol]] = abs(positions[symbol])
+        # Earlier candidates count at their requested size (before later limits trim them)
+        earlier = np.tril(correlated[:, [column[symbols[i]] for i in candidates]], k=-1)
+        used = correlated @ held_values + earlier @ sizes[candidates]
+
+        sizes = sizes.copy()
+        sizes[candidates] = np.clip(Config.MAX_CORRELATED_EXPOSURE_PCT * balance - used, 0.0, sizes[candidates])
+        return sizes
+
+    @staticmethod
+    def correlation_matrix(symbols, market_data, lookback=Config.CORRELATION_LOOKBACK):
+        """
+        Pearson correlation of the last `lookback` close-to-close returns between `symbols`,
+        as one matrix product. Symbols without a full return history correlate with nothing
+        but themselves.
+        """
+        returns = np.zeros((lookback, len(symbols)))
+        for i, symbol in enumerate(symbols):
+            df = market_data.get(symbol)
+            if df is None or len(df) <= lookback:
+                continue
+            closes = df['Close'].to_numpy(dtype=np.float64)[-lookback - 1:]
+            returns[:, i] = closes[1:] / closes[:-1] - 1
+        returns -= returns.mean(axis=0)
+        norms = np.sqrt((returns ** 2).sum(axis=0))
+        z = np.divide(returns, norms, out=np.zeros_like(returns), where=norms > 0)
+        corr = np.nan_to_num(z.T @ z)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def reserve_trade(self, symbol=None, qty=None):
+        """
+        Takes one of today's Config.MAX_TRADES_PER_DAY trades before its order is sent. The
+        journal counts and records it in one transaction, so processes sharing the journal can
+        never exceed the limit between them (check_trade/check_trades only read the count).
+        Fails closed: if the journal cannot be written, no trade is allowed.
+
+        Returns:
+            tuple: Reservation for `release_trade`, or None if the limit is reached.
+        """
+        day = self.state['date']
+        try:
+            reservation = self.store.reserve_trade(day, Config.MAX_TRADES_PER_DAY, symbol, qty)
+        except Exception as e:
+            logger.error("Error reserving trade in risk journal: %s", e)
+            return None
+        if reservation is None:
+            return None
+        self.state['trades_count'] += 1
+        return day, reservation
+
+    def release_trade(self, reservation):
+        """
+        Gives back a reserved trade whose order was rejected.
+        """
+        day, reservation_id = reservation
+        if day == self.state['date']:
+            self.state['trades_count'] -= 1
+        try:
+            self.store.release_trade(day, reservation_id)
+        except Exception as e:
+            logger.error("Error saving risk state: %s", e)
+
+    def record_trade(self, symbol=None, qty=None):
+        """
+        Call this after a trade that bypassed `reserve_trade` (e.g. a stop exit) is executed.
         """
         self.state['trades_count'] += 1
-        self.save_state()
+        try:
+            self.store.record_trade(self.state['date'], symbol, qty)
+        except Exception as e:
+            logger.error("Error saving risk state: %s", e)
 
+    def record_pnl(self, pnl, symbol=None):
+        """
+        Call this when a position is closed with its realized PnL.
+        """
+        self.state['daily_loss'] -= pnl
+        try:
+            self.store.record_pnl(self.state['date'], pnl, symbol)
+        except Exception as e:
+            logger.error("Error saving risk state: %s", e)
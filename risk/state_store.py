@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from config.settings import Config
+
+logger = logging.getLogger("TradingBot")
+
+class RiskStateStore:
+    """
+    Crash-safe, append-only journal of daily risk events in SQLite (WAL mode).
+
+    Every trade and PnL event is one small INSERT, committed atomically, so a crash can never
+    leave a truncated state behind. The daily state is rebuilt at startup with an indexed
+    aggregate over the day's events. WAL mode plus a busy timeout let several strategy
+    processes write to the same journal concurrently without overwriting each other's counts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS risk_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            symbol TEXT,
+            qty REAL,
+            amount REAL,
+            pid INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_risk_events_day_kind ON risk_events (day, kind);
+    """
+
+    # Trades recorded for a day, net of released reservations
+    TRADES_COUNT_SQL = """
+        SELECT COALESCE(SUM(CASE kind WHEN 'trade' THEN 1 ELSE -1 END), 0)
+        FROM risk_events WHERE day = ? AND kind IN ('trade', 'trade_release')
+    """
+
+    def __init__(self, path=Config.RISK_DB_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Orders complete on pipeline threads, so the connection is shared behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=Config.RISK_DB_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _append(self, day, kind, symbol=None, qty=None, amount=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO risk_events (day, ts, kind, symbol, qty, amount, pid) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (day, datetime.now().isoformat(), kind, symbol, qty, amount, os.getpid())
+            )
+
+    def load_day(self, day):
+        """
+        Rebuilds the state for `day`, or returns None if the day has not been started.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT
+                    (SELECT amount FROM risk_events WHERE day = ? AND kind = 'day_start' ORDER BY id LIMIT 1),
+                    (SELECT COALESCE(SUM(CASE kind WHEN 'trade' THEN 1 ELSE -1 END), 0)
+                     FROM risk_events WHERE day = ? AND kind IN ('trade', 'trade_release')),
+                    (SELECT COALESCE(SUM(amount), 0.0) FROM risk_events WHERE day = ? AND kind = 'pnl')
+                """,
+                (day, day, day)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return {
+            "date": day,
+            "trades_count": row[1],
+            "daily_loss": 0.0 - row[2],
+            "starting_balance": row[0],
+        }
+
+    def start_day(self, day, starting_balance):
+        """
+        Records the day's starting balance unless another process already did.
+        Returns the starting balance in effect for the day.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT amount FROM risk_events WHERE day = ? AND kind = 'day_start' ORDER BY id LIMIT 1", (day,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO risk_events (day, ts, kind, amount, pid) VALUES (?, ?, 'day_start', ?, ?)",
+                        (day, datetime.now().isoformat(), starting_balance, os.getpid())
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row is not None else starting_balance
+
+    def record_trade(self, day, symbol=None, qty=None):
+        self._append(day, "trade", symbol=symbol, qty=qty)
+
+    def reserve_trade(self, day, limit, symbol=None, qty=None):
+        """
+        Atomically records a trade for `day` if fewer than `limit` are recorded, across every
+        process sharing the journal: the count and the insert run in one write transaction, so
+        two processes can never both take the last slot.
+
+        Returns:
+            int: Reservation id (for `release_trade`), or None if the limit is reached.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = self._conn.execute(self.TRADES_COUNT_SQL, (day,)).fetchone()[0]
+                reservation = None
+                if count < limit:
+                    reservation = self._conn.execute(
+                        "INSERT INTO risk_events (day, ts, kind, symbol, qty, pid) VALUES (?, ?, 'trade', ?, ?, ?)",
+                        (day, datetime.now().isoformat(), symbol, qty, os.getpid())
+                    ).lastrowid
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return reservation
+
+    def release_trade(self, day, reservation):
+        """
+        Gives back a trade reserved with `reserve_trade` whose order was not placed. The journal
+        stays append-only: a 'trade_release' event cancels the reservation out of the count.
+        """
+        self._append(day, "trade_release", amount=reservation)
+
+    def record_pnl(self, day, pnl, symbol=None):
+        self._append(day, "pnl", symbol=symbol, amount=pnl)
+
+    def trades_count(self, day):
+        """
+        Trades recorded for `day` by every process sharing the journal.
+        """
+        with self._lock:
+            return self._conn.execute(self.TRADES_COUNT_SQL, (day,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,175 @@
+import bisect
+import itertools
+import logging
+import threading
+from config.settings import Config
+
+logger = logging.getLogger("TradingBot")
+
+class _StopBook:
+    """
+    Stops of one symbol and side, sorted by trigger price. `keys` holds (stop_price, id)
+    so stops at the same price keep their registration order.
+    """
+    __slots__ = ('keys', 'stops')
+
+    def __init__(self):
+        self.keys = []
+        self.stops = []
+
+    def add(self, stop):
+        key = (stop['stop_price'], stop['id'])
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.stops.insert(index, stop)
+
+    def remove(self, stop):
+        index = bisect.bisect_left(self.keys, (stop['stop_price'], stop['id']))
+        if index < len(self.keys) and self.stops[index] is stop:
+            del self.keys[index]
+            del self.stops[index]
+
+    def pop_at_or_above(self, price):
+        # Long stops trigger when the price falls to or below them: every stop >= price
+        index = bisect.bisect_left(self.keys, (price, -1))
+        breached = self.stops[index:]
+        del self.keys[index:]
+        del self.stops[index:]
+        return breached
+
+    def pop_at_or_below(self, price):
+        # Short stops trigger when the price rises to or above them: every stop <= price
+        index = bisect.bisect_right(self.keys, (price, float('inf')))
+        breached = self.stops[:index]
+        del self.keys[:index]
+        del self.stops[:index]
+        return breached
+
+class StopMonitor:
+    """
+    Client-side stop-loss book.
+
+    Each stop lives in a per-symbol book for its side, sorted by trigger price, so a price tick
+    finds every breached stop with one bisect and slices them off: O(log n + k) for n stops on
+    the symbol and k breaches, whatever the number of open positions elsewhere. Breached stops
+    are removed as they are returned, so each one fires once; the Executor submits the exits.
+    """
+
+    def __init__(self, stop_loss_pct=Config.STOP_LOSS_PCT):
+        self.stop_loss_pct = stop_loss_pct
+        self._books = {}    # (symbol, side) -> _StopBook
+        self._by_id = {}    # stop id -> stop
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def stop_price(self, entry_price, side='long'):
+        """
+        Trigger price Config.STOP_LOSS_PCT away from `entry_price`, against the position.
+        """
+        return entry_price * (1 - self.stop_loss_pct) if side == 'long' else entry_price * (1 + self.stop_loss_pct)
+
+    def add_stop(self, symbol, qty, stop_price, side='long', entry_price=None):
+        """
+        Registers a stop for `qty` shares of `symbol`.
+
+        Args:
+            symbol (str): Symbol of the position.
+            qty (float): Shares to exit when the stop triggers.
+            stop_price (float): Trigger price.
+            side (str): 'long' (exit by selling) or 'short' (exit by buying).
+            entry_price (float): Position entry price, used to estimate the realized PnL.
+
+        Returns:
+            int: Stop id, for `cancel`.
+        """
+        if side not in ('long', 'short'):
+            raise ValueError(f"Invalid stop side: {side}")
+        with self._lock:
+            stop_id = next(self._ids)
+            stop = {"id": stop_id, "symbol": symbol, "side": side, "qty": float(qty),
+                    "stop_price": float(stop_price), "entry_price": entry_price}
+            book = self._books.get((symbol, side))
+            if book is None:
+                book = self._books[(symbol, side)] = _StopBook()
+            book.add(stop)
+            self._by_id[stop_id] = stop
+        logger.info("Stop set: %s %s %s @ $%.2f", side, qty, symbol, stop_price)
+        return stop_id
+
+    def protect(self, symbol, qty, entry_price, side='long'):
+        """
+        Registers a stop Config.STOP_LOSS_PCT away from `entry_price`.
+        """
+        return self.add_stop(symbol, qty, self.stop_price(entry_price, side), side, entry_price)
+
+    def cancel(self, stop_id):
+        with self._lock:
+            stop = self._by_id.pop(stop_id, None)
+            if stop is not None:
+                self._books[(stop['symbol'], stop['side'])].remove(stop)
+        return stop
+
+    def remove(self, symbol):
+        """
+        Drops every stop on `symbol`, e.g. once its position is closed.
+        """
+        with self._lock:
+            for side in ('long', 'short'):
+                book = self._books.pop((symbol, side), None)
+                if book is not None:
+                    for stop in book.stops:
+                        self._by_id.pop(stop['id'], None)
+
+    def stops(self, symbol=None):
+        with self._lock:
+            return [stop for stop in self._by_id.values() if symbol is None or stop['symbol'] == symbol]
+
+    def check(self, symbol, price):
+        """
+        Removes and returns the stops on `symbol` breached at `price`.
+        """
+        breached = []
+        with self._lock:
+            long_book = self._books.get((symbol, 'long'))
+            if long_book is not None and long_book.keys and long_book.keys[-1][0] >= price:
+                breached.extend(long_book.pop_at_or_above(price))
+            short_book = self._books.get((symbol, 'short'))
+            if short_book is not None and short_book.keys and short_book.keys[0][0] <= price:
+                breached.extend(short_book.pop_at_or_below(price))
+            for stop in breached:
+                del self._by_id[stop['id']]
+                stop['trigger_price'] = price
+        return breached
+
+    def check_prices(self, prices):
+        """
+        Checks a batch of ticks (symbol -> price) and returns every breached stop.
+        """
+        breached = []
+        for symbol, price in prices.items():
+            breached.extend(self.check(symbol, float(price)))
+        return breached
+
+    def sync(self, positions):
+        """
+        Reconciles the book with the broker's positions: positions opened elsewhere (or before a
+        restart) get a stop from their average entry price, and stops on symbols that are no
+        longer held are dropped.
+        """
+        held = {}
+        for position in positions or []:
+            qty = float(position.qty)
+            if qty:
+                held[position.symbol] = (qty, float(position.avg_entry_price))
+
+        with self._lock:
+            covered = {symbol for (symbol, side), book in self._books.items() if book.stops}
+        stale = covered - set(held)
+        for symbol in stale:
+            self.remove(symbol)
+        for symbol, (qty, entry_price) in held.items():
+            if symbol not in covered:
+                self.protect(symbol, abs(qty), entry_price, 'long' if qty > 0 else 'short')
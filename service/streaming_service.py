@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from data.timeframes import BASE_TIMEFRAME
+from monitoring.metrics import STAGE_LATENCY
+from monitoring.logging_setup import audit
+
+logger = logging.getLogger("TradingBot")
+
+class StreamingService:
+    """
+    Event-driven trading: every bar pushed by a bar stream (AlpacaBarStream or ReplayBarStream)
+    goes straight through the strategy's O(1) incremental update and, on a BUY/SELL, into the
+    executor's non-blocking order pipeline. Each bar's close is also checked against the stop
+    monitor, so breached stops exit on the same tick.
+
+    Latency is measured from the moment a bar reaches the process to the order being queued
+    (signal-to-order) and to the broker accepting it (signal-to-ack).
+
+    With a `bar_store` (data.bar_store.BarStore), the warm-up history and every streamed bar
+    are also kept there, e.g. in shared memory for worker processes to read, and the strategy
+    warms up from the store's zero-copy views.
+    """
+
+    def __init__(self, strategy, executor, stream, data_feed=None, bar_store=None):
+        self.strategy = strategy
+        self.executor = executor
+        self.stream = stream
+        self.data_feed = data_feed
+        self.bar_store = bar_store
+        self.bars_processed = 0
+        self.orders_submitted = 0
+        self._order_latency = deque(maxlen=100000)
+        self._ack_latency = deque(maxlen=100000)
+        self._planner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SignalPlanner")
+        # Orders queued on the pipeline whose callbacks have not all run; drained before the
+        # stream stops
+        self._orders = set()
+        self._orders_done = threading.Condition()
+
+    def warm_up(self, symbols, limit=100):
+        """
+        Seeds the incremental strategy state from recent history so signals start on the first bar.
+        The stream pushes 1-minute bars, so the history is 1-minute bars too.
+        """
+        if self.data_feed is None:
+            return
+        market_data = self.data_feed.get_market_data_batch(symbols, timeframe=BASE_TIMEFRAME, limit=limit)
+        history = market_data
+        if self.bar_store is not None:
+            history = self.bar_store.load(market_data)
+        for symbol in market_data:
+            self.strategy.warm_up(symbol, history[symbol])
+        logger.info("Warmed up strategy state for %s/%s symbol(s).", len(market_data), len(symbols))
+
+    def _off_loop(self, fn, *args):
+        # Risk checks and exit sizing make blocking REST and SQLite calls; they run in order on
+        # the planner thread so the event loop keeps dispatching every other symbol's bars
+        future = self._planner.submit(fn, *args)
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Order planning failed: %s", future.exception())
+
+    async def on_bar(self, bar):
+        self.bars_processed += 1
+        if self.bar_store is not None:
+            self.bar_store.append(bar["symbol"], bar["timestamp"], bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+        stop_monitor = self.executor.stop_monitor
+        breached = stop_monitor.check(bar["symbol"], float(bar["close"])) if stop_monitor is not None else None
+        if breached:
+            self._off_loop(self._submit_exits, breached)
+        signal = self.strategy.update(bar["symbol"], bar["close"], bar["timestamp"])
+        if not signal or signal["signal"] == "HOLD":
+            return
+        if breached:
+            # The stop exit already acts on this bar; the strategy's state stays updated
+            logger.info("Dropping %s signal for %s: its stop fired on this bar.", signal['signal'], signal['symbol'])
+            return
+
+        logger.info("Signal: %s %s @ $%.2f (Confidence: %s)", signal['signal'], signal['symbol'], bar['close'], signal['confidence'])
+        audit("signal", price=bar["close"], **signal)
+        self._off_loop(self._submit_signal, signal, bar["close"], bar["received_at"])
+
+    def _keep(self, submitted):
+        # Registered after the executor's own callbacks, so an order is forgotten only once its
+        # fill is recorded
+        for future, _, _ in submitted:
+            with self._orders_done:
+                self._orders.add(future)
+            future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._orders_done:
+            self._orders.discard(future)
+            self._orders_done.notify_all()
+
+    def _submit_exits(self, stops):
+        # Runs on the planner thread
+        self._keep(self.executor.submit_exits(stops))
+
+    def _drain(self):
+        # Lets signals already handed to the planner reach the pipeline, then waits for their
+        # orders so fills are recorded (and new longs get their stops) before shutdown
+        self._planner.shutdown(wait=True)
+        with self._orders_done:
+            self._orders_done.wait_for(lambda: not self._orders)
+
+    def _submit_signal(self, signal, price, received_at):
+        # Runs on the planner thread. Orders still in flight have already reserved their daily
+        # trades in the risk journal, so the risk check sees them without a pending count.
+        submitted = self.executor.submit_signal(signal, price)
+        if not submitted:
+            return
+
+        order_latency = time.perf_counter() - received_at
+        self._order_latency.append(order_latency)
+        STAGE_LATENCY.observe(order_latency, stage="signal_to_order")
+        self.orders_submitted += len(submitted)
+        for future, _, _ in submitted:
+            future.add_done_callback(lambda f: self._on_order_done(f, received_at))
+        self._keep(submitted)
+
+    def _on_order_done(self, future, received_at):
+        if not future.cancelled() and future.exception() is None:
+            ack_latency = time.perf_counter() - received_at
+            self._ack_latency.append(ack_latency)
+            STAGE_LATENCY.observe(ack_latency, stage="signal_to_ack")
+
+    def latency_stats(self):
+        """
+        Signal-to-order and signal-to-ack latency percentiles in milliseconds.
+        """
+        stats = {"bars": self.bars_processed, "orders": self.orders_submitted}
+        for name, samples in (("order", self._order_latency), ("ack", self._ack_latency)):
+            values = np.array(samples) * 1000.0
+            for pct in (50, 95, 99):
+                stats[f"{name}_p{pct}_ms"] = float(np.percentile(values, pct)) if len(values) else None
+        return stats
+
+    def run(self, symbols, warm_up=True):
+        """
+        Subscribes to `symbols` and processes bars until the stream ends or is stopped.
+        """
+        if warm_up:
+            self.warm_up(symbols)
+        self.stream.subscribe_bars(self.on_bar, *symbols)
+        logger.info("Streaming bars for %s symbol(s)...", len(symbols))
+        try:
+            self.stream.run()
+        finally:
+            self._drain()
+            logger.info("Streaming stopped. Latency: %s", self.latency_stats())
+
+    async def run_async(self, symbols):
+        """
+        Same as `run` without warm-up, for streams that expose `run_async` (e.g. ReplayBarStream).
+        """
+        self.stream.subscribe_bars(self.on_bar, *symbols)
+        try:
+            await self.stream.run_async()
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, self._drain)
+            logger.info("Streaming stopped. Latency: %s", self.latency_stats())
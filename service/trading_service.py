@@ -0,0 +1,83 @@
+import logging
+from config.settings import Config
+from broker.alpaca_adapter import AlpacaAdapter, create_session
+from broker.simulated_broker import SimulatedBroker
+from data.market_data import MarketData
+from strategy.moving_average import MovingAverageCrossover
+from strategy.registry import create_strategies
+from risk.risk_engine import RiskEngine
+from risk.state_store import RiskStateStore
+from risk.stop_monitor import StopMonitor
+from execution.executor import Executor
+
+logger = logging.getLogger("TradingBot")
+
+class TradingService:
+    """
+    Long-lived set of trading components for resident (--loop) mode.
+
+    The broker adapter, market data feed, strategy, risk engine and executor are built once and
+    all share one AlpacaAdapter backed by a single pooled HTTP session, so a cycle pays no setup
+    cost beyond a connection check. The adapter reconnects only when that check fails.
+
+    A different broker with the AlpacaAdapter interface (e.g. SimulatedBroker) and risk journal
+    can be injected for simulation and testing.
+    """
+
+    def __init__(self, broker=None, risk_store=None, use_bar_cache=Config.USE_BAR_CACHE, use_data_fallback=True):
+        self.session = create_session() if broker is None else None
+        self.broker = broker if broker is not None else AlpacaAdapter(session=self.session)
+        self.risk_store = risk_store
+        self.use_bar_cache = use_bar_cache
+        self.use_data_fallback = use_data_fallback
+        self.data_feed = None
+        self.strategy = None
+        self.strategies = []
+        self.risk_engine = None
+        self.stop_monitor = None
+        self.executor = None
+
+    @classmethod
+    def simulated(cls, **broker_kwargs):
+        """
+        Service on an in-process SimulatedBroker with an in-memory risk journal, no bar cache and
+        no yfinance fallback, so simulated runs never touch the real account, the journal, the
+        cached history or the network.
+        """
+        return cls(broker=SimulatedBroker(**broker_kwargs), risk_store=RiskStateStore(":memory:"), use_bar_cache=False,
+                   use_data_fallback=False)
+
+    def _build_components(self):
+        # Deferred until the broker is reachable: RiskEngine snapshots the starting balance
+        self.data_feed = MarketData(use_alpaca=True, adapter=self.broker, use_cache=self.use_bar_cache,
+                                    use_fallback=self.use_data_fallback)
+        # The crossover also drives streaming mode; Config.STRATEGIES run together in each cycle
+        self.strategy = MovingAverageCrossover(Config.SMA_SHORT, Config.SMA_LONG)
+        self.strategies = create_strategies()
+        self.risk_engine = RiskEngine(self.broker, store=self.risk_store)
+        self.stop_monitor = StopMonitor()
+        self.executor = Executor(self.broker, self.risk_engine, stop_monitor=self.stop_monitor)
+
+    def prepare_cycle(self):
+        """
+        Makes the service ready for a trading cycle.
+        Returns False if the broker cannot be reached.
+        """
+        if not self.broker.ensure_connected():
+            return False
+
+        if self.executor is None:
+            self._build_components()
+        else:
+            self.risk_engine.roll_day()
+        # Positions opened or closed outside this process get (or lose) their stops
+        self.stop_monitor.sync(self.broker.get_positions())
+        return True
+
+    def close(self):
+        if self.executor is not None and self.executor.pipeline is not None:
+            self.executor.pipeline.close()
+        if self.data_feed is not None:
+            self.data_feed.close()
+        if self.session is not None:
+            self.session.close()
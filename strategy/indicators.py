@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+# Indicators are identified by hashable specs, e.g. ("sma", 20, "close"). Build them with the
+# helpers below rather than by hand:
+#
+#     engine = IndicatorEngine(market_data)
+#     fast, slow = engine.get(sma(20)), engine.get(sma(50))
+#
+# Every value is a (bars x symbols) array, tail-aligned so the last row holds each symbol's
+# latest bar; symbols with shorter histories are NaN-padded at the top.
+
+def source(column):
+    return ("source", column)
+
+def sma(window, column="close"):
+    return ("sma", int(window), column)
+
+def ema(span, column="close"):
+    return ("ema", int(span), column)
+
+def rsi(period=14, column="close"):
+    return ("rsi", int(period), column)
+
+def atr(period=14):
+    return ("atr", int(period))
+
+def bollinger(window=20, num_std=2.0, column="close"):
+    """
+    Bollinger Bands; the value is a dict with 'middle', 'upper' and 'lower' arrays.
+    """
+    return ("bollinger", int(window), float(num_std), column)
+
+def cumulative_sums(closes):
+    """
+    Prefix sums of a close-price array (bars x symbols, or 1-D) with a leading zero row.
+    NaN closes contribute nothing and are tracked in the count sums.
+
+    Returns:
+        tuple: (csum, ccount) arrays of length len(closes) + 1 along axis 0.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    valid = ~np.isnan(closes)
+    csum = np.zeros((closes.shape[0] + 1,) + closes.shape[1:])
+    ccount = np.zeros((closes.shape[0] + 1,) + closes.shape[1:], dtype=np.int64)
+    np.cumsum(np.where(valid, closes, 0.0), axis=0, out=csum[1:])
+    np.cumsum(valid, axis=0, out=ccount[1:])
+    return csum, ccount
+
+def sma_from_cumsum(csum, ccount, window):
+    """
+    Simple moving average from prefix sums in O(n). Like pandas `rolling(window).mean()`,
+    a window containing any NaN close is NaN.
+    """
+    n = csum.shape[0] - 1
+    means = np.full((n,) + csum.shape[1:], np.nan)
+    if window <= n:
+        sums = csum[window:] - csum[:-window]
+        full = (ccount[window:] - ccount[:-window]) == window
+        means[window - 1:] = np.where(full, sums / window, np.nan)
+    return means
+
+_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+_COMPUTE = {}
+
+def _indicator(name):
+    def register(fn):
+        _COMPUTE[name] = fn
+        return fn
+    return register
+
+def _ewm(values, alpha, min_periods=1):
+    """
+    Recursive exponential average (pandas `ewm(alpha=..., adjust=False)`), vectorized across
+    symbols: one NumPy step per bar. Each column starts at its first non-NaN value.
+    """
+    out = np.full(values.shape, np.nan)
+    prev = np.full(values.shape[1:], np.nan)
+    seen = np.zeros(values.shape[1:], dtype=np.int64)
+    for i in range(values.shape[0]):
+        x = values[i]
+        valid = ~np.isnan(x)
+        prev = np.where(valid, np.where(np.isnan(prev), x, alpha * x + (1 - alpha) * prev), prev)
+        seen += valid
+        out[i] = np.where(seen >= min_periods, prev, np.nan)
+    return out
+
+@_indicator("source")
+def _compute_source(engine, column):
+    return engine._panel(_COLUMNS[column])
+
+@_indicator("cumsum")
+def _compute_cumsum(engine, column):
+    return cumulative_sums(engine.get(source(column)))
+
+@_indicator("cumsum_sq")
+def _compute_cumsum_sq(engine, column):
+    return cumulative_sums(engine.get(source(column)) ** 2)
+
+@_indicator("sma")
+def _compute_sma(engine, window, column):
+    csum, ccount = engine.get(("cumsum", column))
+    return sma_from_cumsum(csum, ccount, window)
+
+@_indicator("std")
+def _compute_std(engine, window, column):
+    # Rolling sample standard deviation (ddof=1) from prefix sums of x and x^2
+    mean = engine.get(sma(window, column))
+    sq_sum, sq_count = engine.get(("cumsum_sq", column))
+    mean_sq = sma_from_cumsum(sq_sum, sq_count, window)
+    variance = np.maximum(mean_sq - mean ** 2, 0.0) * window / (window - 1)
+    return np.sqrt(variance)
+
+@_indicator("ema")
+def _compute_ema(engine, span, column):
+    return _ewm(engine.get(source(column)), 2.0 / (span + 1), min_periods=span)
+
+@_indicator("rsi")
+def _compute_rsi(engine, period, column):
+    # Wilder's RSI: smoothed average gain / loss with alpha = 1 / period
+    closes = engine.get(source(column))
+    change = np.full(closes.shape, np.nan)
+    change[1:] = closes[1:] - closes[:-1]
+    avg_gain = _ewm(np.where(np.isnan(change), np.nan, np.maximum(change, 0.0)), 1.0 / period, min_periods=period)
+    avg_loss = _ewm(np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0)), 1.0 / period, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+    return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+
+@_indicator("true_range")
+def _compute_true_range(engine):
+    high, low, close = engine.get(source("high")), engine.get(source("low")), engine.get(source("close"))
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[1:] = close[:-1]
+    ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    # The first bar of each symbol has no previous close: its range is high - low
+    return np.where(np.isnan(prev_close), high - low, np.nanmax(np.where(np.isnan(ranges), -np.inf, ranges), axis=0))
+
+@_indicator("atr")
+def _compute_atr(engine, period):
+    return _ewm(engine.get(("true_range",)), 1.0 / period, min_periods=period)
+
+@_indicator("bollinger")
+def _compute_bollinger(engine, window, num_std, column):
+    middle = engine.get(sma(window, column))
+    width = num_std * engine.get(("std", window, column))
+    return {"middle": middle, "upper": middle + width, "lower": middle - width}
+
+class IndicatorEngine:
+    """
+    Memoized indicator graph over one market data snapshot (symbol -> OHLCV DataFrame, or a
+    data.bar_store.BarStore).
+
+    Indicators are computed on demand, once, for all symbols at once. Dependencies are resolved
+    through the same cache, so shared inputs are never recomputed: sma(20) and sma(50) share
+    one prefix-sum pass over the closes, bollinger(20) reuses sma(20), and every strategy
+    asking for rsi(14) gets the same array.
+    """
+
+    def __init__(self, market_data):
+        self.symbols = list(market_data)
+        self.frames = market_data
+        self.lengths = np.array([len(df) for df in market_data.values()], dtype=np.int64)
+        self.bars = int(self.lengths.max()) if len(self.lengths) else 0
+        self._values = {}
+        self.computed = 0  # graph nodes evaluated, for diagnostics
+
+    def _panel(self, column):
+        # (bars x symbols) float64 panel of one OHLCV column, tail-aligned and NaN-padded
+        panel = np.full((len(self.symbols), self.bars), np.nan)
+        for i, df in enumerate(self.frames.values()):
+            if len(df):
+                panel[i, self.bars - len(df):] = df[column]
+        return panel.T
+
+    def get(self, spec):
+        """
+        Value of the indicator `spec` for every symbol, computing it (and its inputs) on first use.
+        """
+        value = self._values.get(spec)
+        if value is None:
+            value = _COMPUTE[spec[0]](self, *spec[1:])
+            self._values[spec] = value
+            self.computed += 1
+        return value
+
+    def evaluate(self, specs):
+        """
+        Computes every spec in `specs` (e.g. the union of what all strategies need) up front.
+        """
+        for spec in dict.fromkeys(specs):
+            self.get(spec)
+        return self
+
+    def last(self, spec, offset=0):
+        """
+        Per-symbol value `offset` bars before the latest one (offset=0 is the latest bar).
+        """
+        return self.get(spec)[-1 - offset]
+
+    def latest_close(self):
+        return self.last(source("close"))
+
+    def timestamp(self, symbol):
+        index = self.frames[symbol].index
+        ts = index[-1]
+        return ts.isoformat() if hasattr(ts, 'isoformat') else str(ts)
+
+    def frame(self, symbol, specs):
+        """
+        The indicators in `specs` for one symbol as a DataFrame on its own index (for inspection).
+        """
+        column = self.symbols.index(symbol)
+        n = len(self.frames[symbol])
+        data = {}
+        for spec in specs:
+            value = self.get(spec)
+            for name, array in (value.items() if isinstance(value, dict) else [(None, value)]):
+                label = "_".join(str(p) for p in spec) + (f"_{name}" if name else "")
+                data[label] = array[self.bars - n:, column]
+        return pd.DataFrame(data, index=self.frames[symbol].index)
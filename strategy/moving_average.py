@@ -1,53 +1,198 @@
+import math
 import pandas as pd
 import numpy as np
 from config.settings import Config
+from strategy.indicators import cumulative_sums, sma_from_cumsum, sma
+from strategy.registry import register_strategy, signals_from_codes
 import logging
 
 logger = logging.getLogger("TradingBot")
 
+def crossover_signals(closes, short_window, long_window, sums=None):
+    """
+    Vectorized SMA crossover over a whole close-price history (bars x symbols, or 1-D).
+    Applies the same rule as `MovingAverageCrossover.generate_signal` to every bar at once.
+
+    Args:
+        closes (np.ndarray): Close prices.
+        short_window (int): Short SMA window.
+        long_window (int): Long SMA window.
+        sums (tuple): Optional precomputed `cumulative_sums(closes)`, reusable across window pairs.
+
+    Returns:
+        np.ndarray: int8 array shaped like `closes`; 1 = BUY, -1 = SELL, 0 = HOLD.
+    """
+    csum, ccount = sums if sums is not None else cumulative_sums(closes)
+    return crossover_from_smas(sma_from_cumsum(csum, ccount, short_window), sma_from_cumsum(csum, ccount, long_window))
+
+def crossover_from_smas(sma_short, sma_long):
+    """
+    Crossover signals (1 = BUY, -1 = SELL, 0 = HOLD) from precomputed short and long SMA arrays.
+    """
+    signals = np.zeros(sma_short.shape, dtype=np.int8)
+    prev_short, prev_long = sma_short[:-1], sma_long[:-1]
+    last_short, last_long = sma_short[1:], sma_long[1:]
+    # NaN comparisons are False, so bars without both SMAs never signal (as in generate_signal)
+    signals[1:][(prev_short <= prev_long) & (last_short > last_long)] = 1
+    signals[1:][(prev_short >= prev_long) & (last_short < last_long)] = -1
+    return signals
+
+class _SymbolState:
+    """
+    Streaming SMA state for one symbol: a ring buffer of the last `long_window` closes
+    plus running sums for both windows.
+    """
+    __slots__ = ('buffer', 'pos', 'count', 'short_sum', 'long_sum', 'prev_short', 'prev_long')
+
+    def __init__(self, long_window):
+        self.buffer = [0.0] * long_window
+        self.pos = 0
+        self.count = 0
+        self.short_sum = 0.0
+        self.long_sum = 0.0
+        self.prev_short = None
+        self.prev_long = None
+
+@register_strategy("sma_crossover")
 class MovingAverageCrossover:
     def __init__(self, short_window=Config.SMA_SHORT, long_window=Config.SMA_LONG):
         self.short_window = short_window
         self.long_window = long_window
+        self._states = {}
 
-    def generate_signal(self, data):
+    def generate_signal(self, data, symbol=None, timestamp=None):
         """
         Generates a trading signal based on SMA Crossover.
         
         Args:
-            data (pd.DataFrame): OHLCV data with 'Close' column.
+            data: OHLCV data with a 'Close' column (pd.DataFrame, or a data.bar_store.BarView),
+                or an array of closes.
+            symbol (str): Symbol the data belongs to. Defaults to Config.SYMBOL.
+            timestamp: Time of the last bar, for arrays; DataFrames and BarViews report their own.
             
         Returns:
             dict: Structured signal output.
         """
         if len(data) < self.long_window:
-            logger.warning("Not enough data to calculate SMAs")
+            logger.warning("Not enough data to calculate SMAs for %s", symbol or Config.SYMBOL)
             return None
 
-        df = data.copy()
-        df['SMA_Short'] = df['Close'].rolling(window=self.short_window).mean()
-        df['SMA_Long'] = df['Close'].rolling(window=self.long_window).mean()
+        # Only the last long_window + 1 closes matter, and they are read in place: no copy of
+        # the frame, and float32 BarStore views are widened just for that window
+        closes = data if isinstance(data, (np.ndarray, pd.Series)) else data['Close']
+        code = crossover_signals(np.asarray(closes[-(self.long_window + 1):]), self.short_window, self.long_window)[-1]
+
+        index = getattr(data, 'index', None)
+        if timestamp is None and index is not None:
+            timestamp = index[-1]
+
+        return {
+            "symbol": symbol or Config.SYMBOL,
+            "signal": "BUY" if code == 1 else "SELL" if code == -1 else "HOLD",
+            "confidence": 1.0 if code else 0.0,
+            "timestamp": timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
+        }
+
+    def indicators(self):
+        return [sma(self.short_window), sma(self.long_window)]
+
+    def evaluate(self, engine):
+        """
+        Signals for the latest bar of every symbol in a shared IndicatorEngine, from the same
+        SMAs any other strategy reads. Matches `generate_signal` symbol by symbol.
+
+        Returns:
+            list: Structured signal dicts.
+        """
+        short = engine.get(sma(self.short_window))[-2:]
+        long = engine.get(sma(self.long_window))[-2:]
+        codes = crossover_from_smas(short, long)[-1] if engine.bars >= 2 else np.zeros(len(engine.symbols), dtype=np.int8)
+        return signals_from_codes(engine, codes, self.long_window, self.name)
+
+    def update(self, symbol, close, timestamp=None):
+        """
+        Incremental mode: feeds one new bar close for `symbol` and returns the signal for it.
+        SMA_Short/SMA_Long and the crossover state are updated in O(1) from running sums over a
+        per-symbol ring buffer, so no DataFrame is built. Signals match `generate_signal` on the
+        same history.
+
+        Args:
+            symbol (str): Symbol the bar belongs to.
+            close (float): Close price of the new bar.
+            timestamp: Bar timestamp, reported in the signal.
+
+        Returns:
+            dict: Structured signal output, or None until `long_window` bars have been seen.
+        """
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _SymbolState(self.long_window)
+
+        buf, pos = state.buffer, state.pos
+        close = float(close)
+
+        # Drop the closes leaving each window, then add the new one
+        if state.count >= self.long_window:
+            state.long_sum -= buf[pos]
+        if state.count >= self.short_window:
+            state.short_sum -= buf[(pos - self.short_window) % self.long_window]
+        buf[pos] = close
+        state.long_sum += close
+        state.short_sum += close
+        state.count += 1
+        state.pos = (pos + 1) % self.long_window
+
+        # Re-sum once per buffer revolution so floating-point drift cannot accumulate (amortized O(1))
+        if state.pos == 0:
+            state.long_sum = math.fsum(buf)
+            state.short_sum = math.fsum(buf[self.long_window - self.short_window:])
+
+        if state.count < self.long_window:
+            return None
 
-        # Get the last two rows to check for crossover
-        last_row = df.iloc[-1]
-        prev_row = df.iloc[-2]
+        sma_short = state.short_sum / self.short_window
+        sma_long = state.long_sum / self.long_window
+        prev_short, prev_long = state.prev_short, state.prev_long
+        state.prev_short, state.prev_long = sma_short, sma_long
 
         signal = "HOLD"
         confidence = 0.0
-
-        # Crossover Logic:
-        # Buy: Short crosses above Long
-        if prev_row['SMA_Short'] <= prev_row['SMA_Long'] and last_row['SMA_Short'] > last_row['SMA_Long']:
-            signal = "BUY"
-            confidence = 1.0
-        # Sell: Short crosses below Long
-        elif prev_row['SMA_Short'] >= prev_row['SMA_Long'] and last_row['SMA_Short'] < last_row['SMA_Long']:
-            signal = "SELL"
-            confidence = 1.0
+        if prev_short is not None:
+            if prev_short <= prev_long and sma_short > sma_long:
+                signal = "BUY"
+                confidence = 1.0
+            elif prev_short >= prev_long and sma_short < sma_long:
+                signal = "SELL"
+                confidence = 1.0
 
         return {
-            "symbol": Config.SYMBOL,
+            "symbol": symbol,
             "signal": signal,
             "confidence": confidence,
-            "timestamp": last_row.name.isoformat() if hasattr(last_row.name, 'isoformat') else str(last_row.name)
+            "timestamp": timestamp.isoformat() if hasattr(timestamp, 'isoformat') else str(timestamp)
         }
+
+    def warm_up(self, symbol, data):
+        """
+        Seeds the incremental state for `symbol` from historical OHLCV data (a DataFrame or
+        BarView) or an array of closes, replacing any existing state. Returns the signal for the
+        last bar.
+        """
+        self._states.pop(symbol, None)
+        closes = data if isinstance(data, (np.ndarray, pd.Series)) else data['Close']
+        index = getattr(data, 'index', None)
+        timestamps = index if index is not None else [None] * len(closes)
+
+        signal = None
+        for ts, close in zip(timestamps, np.asarray(closes, dtype=np.float64).tolist()):
+            signal = self.update(symbol, close, ts)
+        return signal
+
+    def reset(self, symbol=None):
+        """
+        Clears the incremental state for one symbol, or for all symbols.
+        """
+        if symbol is None:
+            self._states.clear()
+        else:
+            self._states.pop(symbol, None)
@@ -0,0 +1,108 @@
+import importlib
+import logging
+from config.settings import Config
+
+logger = logging.getLogger("TradingBot")
+
+# Strategy name -> class. Strategies register themselves with @register_strategy("name").
+STRATEGIES = {}
+
+# Modules holding the built-in strategies, imported on first lookup
+BUILTIN_MODULES = ("strategy.moving_average", "strategy.rsi_reversion")
+
+def register_strategy(name):
+    """
+    Class decorator adding a strategy to the registry under `name`.
+
+    A registered strategy declares the indicators it reads with `indicators()` and turns them
+    into signals with `evaluate(engine)`, where `engine` is a shared IndicatorEngine.
+    """
+    def register(cls):
+        cls.name = name
+        STRATEGIES[name] = cls
+        return cls
+    return register
+
+def _load_builtins():
+    for module in BUILTIN_MODULES:
+        importlib.import_module(module)
+
+def available_strategies():
+    """
+    Names of every registered strategy, sorted.
+    """
+    _load_builtins()
+    return sorted(STRATEGIES)
+
+def create_strategy(name, **params):
+    """
+    Instantiates the registered strategy `name`.
+    Raises ValueError for unknown names.
+    """
+    available = available_strategies()
+    if name not in available:
+        raise ValueError(f"Unknown strategy: {name} (available: {', '.join(available)})")
+    return STRATEGIES[name](**params)
+
+def create_strategies(names=None):
+    """
+    Instantiates every strategy in `names` (default: Config.STRATEGIES) with its default parameters.
+    All names are checked first, so a misspelt STRATEGIES setting fails with one clear error.
+    """
+    names = list(names or Config.STRATEGIES)
+    available = available_strategies()
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown strategy in STRATEGIES: {', '.join(unknown)} (available: {', '.join(available)})")
+    if not names:
+        raise ValueError(f"STRATEGIES is empty (available: {', '.join(available)})")
+    return [create_strategy(name) for name in names]
+
+def evaluate_strategies(strategies, market_data):
+    """
+    Runs several strategies over one market data snapshot (symbol -> OHLCV DataFrame).
+
+    All strategies share one IndicatorEngine: the union of the indicators they ask for is
+    computed once, vectorized across symbols, and every strategy reads the same arrays.
+
+    Returns:
+        list: (signal, current_price) tuples, one per strategy and symbol with enough data.
+    """
+    from strategy.indicators import IndicatorEngine
+
+    if not market_data:
+        return []
+    engine = IndicatorEngine(market_data)
+    engine.evaluate([spec for strategy in strategies for spec in strategy.indicators()])
+
+    prices = engine.latest_close()
+    column = {symbol: i for i, symbol in enumerate(engine.symbols)}
+    results = []
+    for strategy in strategies:
+        for signal in strategy.evaluate(engine):
+            results.append((signal, float(prices[column[signal['symbol']]])))
+    return results
+
+_SIGNAL_NAMES = {1: "BUY", -1: "SELL", 0: "HOLD"}
+
+def signals_from_codes(engine, codes, min_bars, name="strategy"):
+    """
+    Turns per-symbol signal codes for the latest bar (1 = BUY, -1 = SELL, 0 = HOLD) into the
+    structured signal dicts returned by `generate_signal`. Symbols with fewer than `min_bars`
+    bars produce no signal, as in `generate_signal`.
+    """
+    short = engine.lengths < min_bars
+    if short.any():
+        logger.warning("Not enough data for %s on %s symbol(s)", name, int(short.sum()))
+    signals = []
+    for i, symbol in enumerate(engine.symbols):
+        if short[i]:
+            continue
+        code = int(codes[i])
+        signals.append({
+            "symbol": symbol,
+            "signal": _SIGNAL_NAMES[code],
+            "confidence": 1.0 if code else 0.0,
+            "timestamp": engine.timestamp(symbol)
+        })
+    return signals
@@ -0,0 +1,51 @@
+import numpy as np
+from config.settings import Config
+from strategy.indicators import IndicatorEngine, rsi
+from strategy.registry import register_strategy, signals_from_codes
+import logging
+
+logger = logging.getLogger("TradingBot")
+
+@register_strategy("rsi_reversion")
+class RsiMeanReversion:
+    """
+    RSI mean reversion: BUY when RSI crosses back above the oversold level, SELL when it
+    crosses back below the overbought level.
+    """
+
+    def __init__(self, period=Config.RSI_PERIOD, oversold=Config.RSI_OVERSOLD, overbought=Config.RSI_OVERBOUGHT):
+        self.period = period
+        self.oversold = oversold
+        self.overbought = overbought
+
+    def indicators(self):
+        return [rsi(self.period)]
+
+    def evaluate(self, engine):
+        """
+        Signals for the latest bar of every symbol in a shared IndicatorEngine.
+
+        Returns:
+            list: Structured signal dicts.
+        """
+        codes = np.zeros(len(engine.symbols), dtype=np.int8)
+        if engine.bars >= 2:
+            prev, last = engine.get(rsi(self.period))[-2:]
+            # NaN comparisons are False, so symbols without a full RSI history never signal
+            codes[(prev <= self.oversold) & (last > self.oversold)] = 1
+            codes[(prev >= self.overbought) & (last < self.overbought)] = -1
+        return signals_from_codes(engine, codes, self.period + 2, self.name)
+
+    def generate_signal(self, data, symbol=None):
+        """
+        Generates a trading signal for one symbol's OHLCV data.
+
+        Args:
+            data (pd.DataFrame): OHLCV data with 'Close' column.
+            symbol (str): Symbol the data belongs to. Defaults to Config.SYMBOL.
+
+        Returns:
+            dict: Structured signal output, or None if there is not enough data.
+        """
+        signals = self.evaluate(IndicatorEngine({symbol or Config.SYMBOL: data}))
+        return signals[0] if signals else None